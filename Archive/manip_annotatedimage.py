@@ -1,6 +1,9 @@
 import csv
 import os
 
+# I/O buffer for the CSV files, large enough to keep read(2)/write(2) calls rare
+CSV_BUFFER_SIZE = 1 << 20
+
 def extract_tagged_image_filenames(input_csv='imagevelo.csv', output_csv='tagged_images.csv'):
     """
     Extract filenames from image paths for rows with non-empty tag columns
@@ -15,62 +18,69 @@ def extract_tagged_image_filenames(input_csv='imagevelo.csv', output_csv='tagged
     try:
         processed_count = 0
         
-        with open(input_csv, 'r', encoding='utf-8') as infile:
+        with open(input_csv, 'r', encoding='utf-8', newline='', buffering=CSV_BUFFER_SIZE) as infile:
             # Read the CSV
-            reader = csv.DictReader(infile)
+            reader = csv.reader(infile)
+            header = next(reader, [])
             
             # Check if required columns exist
-            if 'tag' not in reader.fieldnames:
+            if 'tag' not in header:
                 print("❌ 'tag' column not found in CSV")
                 return 0
             
-            if 'image' not in reader.fieldnames:
+            if 'image' not in header:
                 print("❌ 'image' column not found in CSV")
                 return 0
             
-            # Collect rows with non-empty tags
-            tagged_rows = []
+            tag_i = header.index('tag')
+            image_i = header.index('image')
+            min_len = max(tag_i, image_i) + 1
             
-            for row in reader:
-                tag_value = row.get('tag', '').strip()
-                image_value = row.get('image', '').strip()
-                
-                # Check if tag is not empty
-                if tag_value and image_value:
-                    # Extract filename from image path
-                    # Example: "/data/local-files/?d=street_view_images/00-vfNxEOHw-tVbu51OmgA_View1_N_FOV90.0.jpg"
-                    # Result: "00-vfNxEOHw-tVbu51OmgA_View1_N_FOV90.0.jpg"
-                    filename = image_value.split('/')[-1]
+            # Write rows with non-empty tags as they are found, keeping only
+            # a few samples in memory for the report
+            outfile = None
+            samples = []
+            
+            try:
+                for row in reader:
+                    if len(row) < min_len:
+                        continue
+                    
+                    tag_value = row[tag_i].strip()
+                    image_value = row[image_i].strip()
                     
-                    tagged_rows.append({
-                        'filename': filename,
-                        'tag': tag_value,
-                        'original_image_path': image_value
-                    })
-                    processed_count += 1
+                    # Check if tag is not empty
+                    if tag_value and image_value:
+                        # Extract filename from image path
+                        # Example: "/data/local-files/?d=street_view_images/00-vfNxEOHw-tVbu51OmgA_View1_N_FOV90.0.jpg"
+                        # Result: "00-vfNxEOHw-tVbu51OmgA_View1_N_FOV90.0.jpg"
+                        filename = image_value.rpartition('/')[2]
+                        
+                        # Only create the output once there is something to write
+                        if outfile is None:
+                            outfile = open(output_csv, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE)
+                            writer = csv.writer(outfile)
+                            writer.writerow(['filename', 'tag', 'original_image_path'])
+                        
+                        writer.writerow((filename, tag_value, image_value))
+                        
+                        if len(samples) < 5:
+                            samples.append((filename, tag_value))
+                        processed_count += 1
+            finally:
+                if outfile is not None:
+                    outfile.close()
         
-        # Write to output CSV
-        if tagged_rows:
-            with open(output_csv, 'w', newline='', encoding='utf-8') as outfile:
-                fieldnames = ['filename', 'tag', 'original_image_path']
-                writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-                
-                # Write header
-                writer.writeheader()
-                
-                # Write data
-                writer.writerows(tagged_rows)
-            
+        if processed_count > 0:
             print(f"✅ Successfully processed {processed_count} tagged images")
             print(f"📁 Output saved to: {output_csv}")
             
             # Show sample of results
-            if processed_count > 0:
-                print(f"\n📋 Sample results (first 5):")
-                for i, row in enumerate(tagged_rows[:5]):
-                    print(f"   {i+1}. {row['filename']} (tag: {row['tag']})")
-                if processed_count > 5:
-                    print(f"   ... and {processed_count - 5} more")
+            print(f"\n📋 Sample results (first 5):")
+            for i, (filename, tag_value) in enumerate(samples):
+                print(f"   {i+1}. {filename} (tag: {tag_value})")
+            if processed_count > 5:
+                print(f"   ... and {processed_count - 5} more")
         else:
             print("⚠️ No rows found with non-empty tags")
         
@@ -97,19 +107,31 @@ def extract_filenames_only(input_csv='imagevelo.csv', output_csv='filenames_only
     try:
         filenames = []
         
-        with open(input_csv, 'r', encoding='utf-8') as infile:
-            reader = csv.DictReader(infile)
+        with open(input_csv, 'r', encoding='utf-8', newline='', buffering=CSV_BUFFER_SIZE) as infile:
+            reader = csv.reader(infile)
+            header = next(reader, [])
+            
+            if 'tag' not in header or 'image' not in header:
+                print("❌ 'tag' or 'image' column not found in CSV")
+                return 0
+            
+            tag_i = header.index('tag')
+            image_i = header.index('image')
+            min_len = max(tag_i, image_i) + 1
             
             for row in reader:
-                tag_value = row.get('tag', '').strip()
-                image_value = row.get('image', '').strip()
+                if len(row) < min_len:
+                    continue
+                
+                tag_value = row[tag_i].strip()
+                image_value = row[image_i].strip()
                 
                 if tag_value and image_value:
-                    filename = image_value.split('/')[-1]
+                    filename = image_value.rpartition('/')[2]
                     filenames.append(filename)
         
         # Write simple CSV with just filenames
-        with open(output_csv, 'w', newline='', encoding='utf-8') as outfile:
+        with open(output_csv, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as outfile:
             writer = csv.writer(outfile)
             writer.writerow(['filename'])  # Header
             
@@ -124,13 +146,44 @@ def extract_filenames_only(input_csv='imagevelo.csv', output_csv='filenames_only
         return 0
 
 import csv
+import errno
 import os
 import shutil
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+def move_one_file(filename, source_file, dest_file):
+    """
+    Move a single file, used as the worker of move_tagged_images
+    
+    Args:
+        filename (str): File name, reported back with the result
+        source_file (str): Full source path
+        dest_file (str): Full destination path
+    
+    Returns:
+        tuple: (filename, stats key, error message or None)
+    """
+    try:
+        os.rename(source_file, dest_file)
+    except FileNotFoundError:
+        return filename, 'file_not_found', None
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            return filename, 'move_errors', str(e)
+        
+        # Source and destination on different filesystems, copy + delete instead
+        try:
+            shutil.move(source_file, dest_file)
+        except Exception as e:
+            return filename, 'move_errors', str(e)
+    
+    return filename, 'moved_successfully', None
 
 def move_tagged_images(tagged_csv='tagged_images.csv', 
                       source_dir='/home/arthur/streetview_output', 
-                      dest_dir='/home/arthur/streetview_newoutput'):
+                      dest_dir='/home/arthur/streetview_newoutput',
+                      max_workers=16,
+                      verbose=False):
     """
     Move image files listed in tagged_images.csv from source to destination directory
     
@@ -138,14 +191,15 @@ def move_tagged_images(tagged_csv='tagged_images.csv',
         tagged_csv (str): Path to CSV file containing filename column
         source_dir (str): Source directory path
         dest_dir (str): Destination directory path
+        max_workers (int): Number of threads issuing renames in parallel
+        verbose (bool): Print one line per file instead of only the summary
     
     Returns:
         dict: Statistics about the move operation
     """
     
     # Create destination directory if it doesn't exist
-    dest_path = Path(dest_dir)
-    dest_path.mkdir(parents=True, exist_ok=True)
+    os.makedirs(dest_dir, exist_ok=True)
     print(f"📁 Destination directory: {dest_dir}")
     
     # Statistics tracking
@@ -158,7 +212,7 @@ def move_tagged_images(tagged_csv='tagged_images.csv',
     }
     
     try:
-        with open(tagged_csv, 'r', encoding='utf-8') as file:
+        with open(tagged_csv, 'r', encoding='utf-8', newline='', buffering=CSV_BUFFER_SIZE) as file:
             reader = csv.DictReader(file)
             
             # Check if filename column exists
@@ -168,40 +222,16 @@ def move_tagged_images(tagged_csv='tagged_images.csv',
             
             print(f"📋 Processing files from {tagged_csv}...")
             
+            filenames = []
             for row_num, row in enumerate(reader, 1):
                 filename = row.get('filename', '').strip()
                 
                 if not filename:
-                    print(f"   ⚠️  Row {row_num}: Empty filename, skipping")
+                    if verbose:
+                        print(f"   ⚠️  Row {row_num}: Empty filename, skipping")
                     continue
                 
-                stats['total_files'] += 1
-                
-                # Full paths
-                source_file = Path(source_dir) / filename
-                dest_file = Path(dest_dir) / filename
-                
-                try:
-                    # Check if source file exists
-                    if not source_file.exists():
-                        print(f"   ❌ {filename}: Source file not found")
-                        stats['file_not_found'] += 1
-                        continue
-                    
-                    # Check if destination file already exists
-                    if dest_file.exists():
-                        print(f"   ⚠️  {filename}: Already exists in destination, skipping")
-                        stats['already_exists'] += 1
-                        continue
-                    
-                    # Move the file
-                    shutil.move(str(source_file), str(dest_file))
-                    print(f"   ✅ {filename}: Moved successfully")
-                    stats['moved_successfully'] += 1
-                    
-                except Exception as e:
-                    print(f"   ❌ {filename}: Move failed - {e}")
-                    stats['move_errors'] += 1
+                filenames.append(filename)
     
     except FileNotFoundError:
         print(f"❌ CSV file not found: {tagged_csv}")
@@ -210,6 +240,58 @@ def move_tagged_images(tagged_csv='tagged_images.csv',
         print(f"❌ Error reading CSV: {e}")
         return stats
     
+    stats['total_files'] = len(filenames)
+    
+    # List both directories once instead of two stat() calls per file.
+    # The destination check matters: rename(2) silently replaces existing files.
+    try:
+        with os.scandir(source_dir) as entries:
+            source_names = {entry.name for entry in entries}
+    except FileNotFoundError:
+        print(f"❌ Source directory not found: {source_dir}")
+        return stats
+    
+    with os.scandir(dest_dir) as entries:
+        dest_names = {entry.name for entry in entries}
+    
+    to_move = []
+    for filename in filenames:
+        if filename in dest_names:
+            if verbose:
+                print(f"   ⚠️  {filename}: Already exists in destination, skipping")
+            stats['already_exists'] += 1
+        elif filename not in source_names:
+            if verbose:
+                print(f"   ❌ {filename}: Source file not found")
+            stats['file_not_found'] += 1
+        else:
+            to_move.append(filename)
+            # Later duplicates of the same row are then reported as existing
+            dest_names.add(filename)
+    
+    # Join the directory part once, plain string concatenation per file
+    source_prefix = os.path.join(source_dir, '')
+    dest_prefix = os.path.join(dest_dir, '')
+    
+    # rename(2) releases the GIL, so several threads keep the filesystem busy
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(move_one_file, filename, source_prefix + filename, dest_prefix + filename)
+            for filename in to_move
+        ]
+        
+        for future in as_completed(futures):
+            filename, status, error = future.result()
+            stats[status] += 1
+            
+            # Failures are always shown, they carry the error message
+            if status == 'move_errors':
+                print(f"   ❌ {filename}: Move failed - {error}")
+            elif verbose and status == 'moved_successfully':
+                print(f"   ✅ {filename}: Moved successfully")
+            elif verbose:
+                print(f"   ❌ {filename}: Source file not found")
+    
     # Print summary
     print(f"\n📊 MOVE OPERATION SUMMARY:")
     print(f"   📁 Total files processed: {stats['total_files']}")
@@ -222,9 +304,14 @@ def move_tagged_images(tagged_csv='tagged_images.csv',
 
 def move_tagged_images_with_subprocess(tagged_csv='tagged_images.csv', 
                                      source_dir='/home/arthur/streetview_output', 
-                                     dest_dir='/home/arthur/streetview_newoutput'):
+                                     dest_dir='/home/arthur/streetview_newoutput',
+                                     batch_size=1000):
     """
     Alternative version using subprocess to run mv commands
+    
+    Files are moved with one `mv -t dest_dir ...` call per batch instead of
+    one process per file (batch_size keeps the command line under ARG_MAX).
+    move_tagged_images is still the faster option.
     """
     import subprocess
     
@@ -234,7 +321,9 @@ def move_tagged_images_with_subprocess(tagged_csv='tagged_images.csv',
     stats = {'total': 0, 'success': 0, 'failed': 0}
     
     try:
-        with open(tagged_csv, 'r', encoding='utf-8') as file:
+        source_paths = []
+        
+        with open(tagged_csv, 'r', encoding='utf-8', newline='', buffering=CSV_BUFFER_SIZE) as file:
             reader = csv.DictReader(file)
             
             for row in reader:
@@ -242,23 +331,25 @@ def move_tagged_images_with_subprocess(tagged_csv='tagged_images.csv',
                 if not filename:
                     continue
                 
-                stats['total'] += 1
-                source_path = f"{source_dir}/{filename}"
-                dest_path = f"{dest_dir}/{filename}"
-                
-                try:
-                    # Run mv command
-                    result = subprocess.run(['mv', source_path, dest_path], 
-                                          capture_output=True, text=True, check=True)
-                    print(f"✅ Moved: {filename}")
-                    stats['success'] += 1
-                    
-                except subprocess.CalledProcessError as e:
-                    print(f"❌ Failed to move {filename}: {e.stderr.strip()}")
-                    stats['failed'] += 1
-                except Exception as e:
-                    print(f"❌ Error with {filename}: {e}")
-                    stats['failed'] += 1
+                source_paths.append(f"{source_dir}/{filename}")
+        
+        stats['total'] = len(source_paths)
+        
+        for start in range(0, len(source_paths), batch_size):
+            batch = source_paths[start:start + batch_size]
+            
+            # mv keeps going after a failing file and reports one stderr line per failure
+            result = subprocess.run(['mv', '-t', dest_dir, '--', *batch],
+                                  capture_output=True, text=True)
+            
+            errors = result.stderr.strip().splitlines() if result.returncode else []
+            for error in errors:
+                print(f"❌ {error}")
+            
+            failed = min(len(errors), len(batch))
+            stats['failed'] += failed
+            stats['success'] += len(batch) - failed
+            print(f"✅ Moved batch of {len(batch) - failed}/{len(batch)} files")
     
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -284,18 +375,18 @@ def quick_extract_panoids(input_csv='tagged_images.csv', output_csv='panoids.csv
     Quick and simple version
     """
     try:
-        panoids = []
+        # dict keeps first-seen order with O(1) duplicate checks
+        panoids = {}
         
-        with open(input_csv, 'r') as infile:
+        with open(input_csv, 'r', newline='', buffering=CSV_BUFFER_SIZE) as infile:
             reader = csv.DictReader(infile)
             for row in reader:
                 filename = row.get('filename', '')
                 if filename and '_' in filename:
-                    panoid = filename.split('_View')[0]
-                    if panoid not in panoids:  # Avoid duplicates
-                        panoids.append(panoid)
+                    panoid = filename.split('_View', 1)[0]
+                    panoids.setdefault(panoid, None)
         
-        with open(output_csv, 'w', newline='') as outfile:
+        with open(output_csv, 'w', newline='', buffering=CSV_BUFFER_SIZE) as outfile:
             writer = csv.writer(outfile)
             writer.writerow(['panoid'])
             for panoid in panoids:
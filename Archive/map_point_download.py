@@ -1,13 +1,18 @@
-import osmnx as ox
-import networkx as nx
+import math
+import os
+import sys
 import numpy as np
 import pandas as pd
-import csv
-from geopy.distance import geodesic
-from shapely.geometry import Point, LineString
-import geopandas as gpd
 
-def generate_road_points_in_circle(center_lon, center_lat, radius_km, point_spacing_m=50, output_csv="road_points.csv"):
+# road_kernels sits next to this file, make it importable whatever the
+# working directory or the way this module is loaded
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# osmnx, shapely, numba (road_kernels) and folium are imported inside the
+# functions that use them, so calculate_point_spacing and the CSV helpers
+# can be imported without loading them
+
+def generate_road_points_in_circle(center_lon, center_lat, radius_km, point_spacing_m=50, output_csv="road_points.csv", graph_cache_file=None):
     """
     Generate evenly spaced points along all roads within a circular area
     
@@ -17,137 +22,120 @@ def generate_road_points_in_circle(center_lon, center_lat, radius_km, point_spac
         radius_km (float): Radius of circle in kilometers
         point_spacing_m (float): Distance between points in meters (default: 50m)
         output_csv (str): Output CSV file path
+        graph_cache_file (str): GraphML file the road network is saved to and
+            reloaded from on later runs (default: derived from center and radius)
     
     Returns:
         int: Number of points generated
     """
     
+    import osmnx as ox
+    import shapely
+    from road_kernels import interp_and_filter_edges, warm_up_kernels
+    
+    # Keep Overpass responses on disk so repeated runs do not hit the API again
+    ox.settings.use_cache = True
+    ox.settings.log_console = False
+    
     try:
-        print(f"🗺️  Downloading road network for circle center ({center_lat}, {center_lon}) with radius {radius_km}km...")
-        
-        # Download road network within the circular area
-        # Add buffer to ensure we get complete road segments
-        graph = ox.graph_from_point(
-            (center_lat, center_lon), 
-            dist=radius_km * 1000 + 500,  # Add 500m buffer
-            network_type='drive'  # Get drivable roads
-        )
+        if graph_cache_file is None:
+            graph_cache_file = f"graph_{center_lat:.4f}_{center_lon:.4f}_{radius_km}.graphml"
         
-        print(f"📊 Downloaded graph with {len(graph.nodes)} nodes and {len(graph.edges)} edges")
+        if os.path.exists(graph_cache_file):
+            print(f"📂 Loading cached road network from {graph_cache_file}...")
+            graph = ox.load_graphml(graph_cache_file)
+        else:
+            print(f"🗺️  Downloading road network for circle center ({center_lat}, {center_lon}) with radius {radius_km}km...")
+            
+            # Download road network within the circular area
+            # Add buffer to ensure we get complete road segments
+            graph = ox.graph_from_point(
+                (center_lat, center_lon), 
+                dist=radius_km * 1000 + 500,  # Add 500m buffer
+                network_type='drive'  # Get drivable roads
+            )
+            ox.save_graphml(graph, graph_cache_file)
+        
+        print(f"📊 Loaded graph with {len(graph.nodes)} nodes and {len(graph.edges)} edges")
         
         # Convert to GeoDataFrame of edges (road segments)
         edges_gdf = ox.graph_to_gdfs(graph, nodes=False, edges=True)
         
-        # Create circle boundary for filtering
-        center_point = Point(center_lon, center_lat)
+        # Raw geometry and (u, v, key) index arrays, no Series built per edge
+        geometries = edges_gdf.geometry.to_numpy()
+        edge_index = edges_gdf.index.to_numpy()
         
-        # Convert radius from km to degrees (approximate)
-        # 1 degree ≈ 111 km at equator
-        radius_deg = radius_km / 111.0
+        # Flatten every edge into one vertex array with per-edge offsets, so the
+        # whole network goes through the compiled kernel in a single call
+        coords_flat, vertex_edge = shapely.get_coordinates(geometries, return_index=True)
+        edge_offsets = np.zeros(len(geometries) + 1, dtype=np.int64)
+        edge_offsets[1:] = np.cumsum(np.bincount(vertex_edge, minlength=len(geometries)))
         
-        all_points = []
-        processed_edges = 0
+        # Compile the kernels before timing-sensitive work starts
+        warm_up_kernels()
         
         print(f"🛣️  Processing {len(edges_gdf)} road segments...")
         
-        for idx, edge in edges_gdf.iterrows():
-            try:
-                # Get the geometry of the road segment
-                line_geom = edge['geometry']
-                
-                if line_geom is None:
-                    continue
-                
-                # Calculate total length of this road segment in meters
-                # Use approximate conversion: 1 degree ≈ 111 km
-                line_length_m = line_geom.length * 111000
-                
-                # Calculate number of points needed for this segment
-                num_points = max(2, int(line_length_m / point_spacing_m))
-                
-                # Generate evenly spaced points along the line
-                for i in range(num_points):
-                    # Get point at fraction i/(num_points-1) along the line
-                    fraction = i / (num_points - 1) if num_points > 1 else 0
-                    point_on_line = line_geom.interpolate(fraction, normalized=True)
-                    
-                    point_lon = point_on_line.x
-                    point_lat = point_on_line.y
-                    
-                    # Check if point is within the circular boundary
-                    point_geom = Point(point_lon, point_lat)
-                    distance_from_center = geodesic(
-                        (center_lat, center_lon), 
-                        (point_lat, point_lon)
-                    ).kilometers
-                    
-                    if distance_from_center <= radius_km:
-                        all_points.append({
-                            'latitude': point_lat,
-                            'longitude': point_lon,
-                            'distance_from_center_km': distance_from_center,
-                            'road_segment_id': f"{idx[0]}_{idx[1]}_{idx[2]}" if len(idx) == 3 else f"{idx[0]}_{idx[1]}"
-                        })
-                
-                processed_edges += 1
-                if processed_edges % 100 == 0:
-                    print(f"   Processed {processed_edges}/{len(edges_gdf)} edges, generated {len(all_points)} points so far...")
-                    
-            except Exception as e:
-                print(f"   ⚠️  Error processing edge {idx}: {e}")
-                continue
+        # Edges are independent, so they are interpolated and filtered in parallel
+        lats, lons, distances, edge_ids = interp_and_filter_edges(
+            np.ascontiguousarray(coords_flat), edge_offsets,
+            point_spacing_m, center_lat, center_lon, radius_km
+        )
+        point_count = len(lats)
+        print(f"   Processed {len(edges_gdf)} edges, generated {point_count} points")
         
         # Remove duplicate points (within 10m of each other)
-        # Remove duplicate points (within 10m of each other) - ULTRA FAST VERSION
         print(f"🧹 Removing duplicate points...")
-
-        if len(all_points) > 0:
-            # Use set with rounded coordinates for O(n) deduplication
-            seen_coords = set()
-            unique_points = []
+        
+        if point_count:
+            # Round to ~10m precision (0.0001 degrees ≈ 11m) and pack both
+            # grid cells into one int64 key, then keep the first point per key
+            lat_cells = np.rint(lats * 1e4).astype(np.int64)
+            lon_cells = np.rint(lons * 1e4).astype(np.int64)
+            keys = (lat_cells << 32) | (lon_cells & 0xFFFFFFFF)
+            _, first_index = np.unique(keys, return_index=True)
+            first_index.sort()
             
-            # Round to ~10m precision (0.0001 degrees ≈ 11m)
-            for point in all_points:
-                # Create a rounded coordinate tuple
-                rounded_lat = round(point['latitude'], 4)
-                rounded_lon = round(point['longitude'], 4)
-                coord_key = (rounded_lat, rounded_lon)
-                
-                if coord_key not in seen_coords:
-                    seen_coords.add(coord_key)
-                    unique_points.append(point)
+            # Points carry integer edge indexes until here; segment id strings are
+            # formatted once per edge that kept a point, not once per point
+            used_edges, segment_codes = np.unique(edge_ids[first_index], return_inverse=True)
+            segment_table = np.array(
+                [f"{idx[0]}_{idx[1]}_{idx[2]}" if len(idx) == 3 else f"{idx[0]}_{idx[1]}" for idx in edge_index[used_edges]],
+                dtype=object
+            )
             
-            print(f"📊 Ultra-fast deduplication: {len(all_points)} → {len(unique_points)} points (removed {len(all_points) - len(unique_points)} duplicates)")
+            # Sort points by distance from center with one stable argsort and
+            # gather every column through it
+            order = np.argsort(distances[first_index], kind='stable')
+            sorted_index = first_index[order]
+            
+            # Typed columns: the segment ids stay categorical codes until written
+            points_df = pd.DataFrame({
+                'latitude': lats[sorted_index],
+                'longitude': lons[sorted_index],
+                'distance_from_center_km': distances[sorted_index],
+                'road_segment_id': pd.Categorical.from_codes(segment_codes[order], segment_table)
+            })
         else:
-            unique_points = []
-        
-        print(f"📊 Generated {len(unique_points)} unique road points (removed {len(all_points) - len(unique_points)} duplicates)")
+            points_df = pd.DataFrame(columns=['latitude', 'longitude', 'distance_from_center_km', 'road_segment_id'])
         
-        # Sort points by distance from center
-        unique_points.sort(key=lambda p: p['distance_from_center_km'])
+        print(f"📊 Generated {len(points_df)} unique road points (removed {point_count - len(points_df)} duplicates)")
         
         # Write to CSV
-        if unique_points:
-            with open(output_csv, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['point_id', 'latitude', 'longitude', 'distance_from_center_km', 'road_segment_id']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                
-                for i, point in enumerate(unique_points, 1):
-                    writer.writerow({
-                        'point_id': i,
-                        'latitude': point['latitude'],
-                        'longitude': point['longitude'],
-                        'distance_from_center_km': point['distance_from_center_km'],
-                        'road_segment_id': point['road_segment_id']
-                    })
+        if len(points_df):
+            # Distances are stored as float32; to_csv formats and writes
+            # the rows in chunks so only one chunk of strings is held at a time
+            points_df = points_df.astype({'distance_from_center_km': np.float32})
+            points_df.index = np.arange(1, len(points_df) + 1, dtype=np.int32)
+            points_df.index.name = 'point_id'
+            points_df.to_csv(output_csv, encoding='utf-8', chunksize=200_000, float_format='%.6f')
             
-            print(f"✅ Successfully created {output_csv} with {len(unique_points)} road points")
+            print(f"✅ Successfully created {output_csv} with {len(points_df)} road points")
             print(f"📏 Point spacing: ~{point_spacing_m}m")
             print(f"🎯 Circle center: ({center_lat}, {center_lon})")
             print(f"📐 Circle radius: {radius_km}km")
             
-            return len(unique_points)
+            return len(points_df)
         else:
             print("❌ No points generated")
             return 0
@@ -167,7 +155,14 @@ def calculate_point_spacing(lat1, lon1, lat2, lon2):
     Returns:
         float: Distance in meters
     """
-    return geodesic((lat1, lon1), (lat2, lon2)).meters
+    # Haversine on the mean Earth radius, within ~0.2% of the ellipsoidal
+    # geodesic distance (millimetres at point spacing scale)
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    half_dphi = (phi2 - phi1) / 2
+    half_dlambda = math.radians(lon2 - lon1) / 2
+    a = math.sin(half_dphi) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(half_dlambda) ** 2
+    return 2 * 6371008.8 * math.asin(math.sqrt(a))
 
 """
 # Example usage based on your points
@@ -198,10 +193,6 @@ if __name__ == "__main__":
     """
 
 
-import folium
-import pandas as pd
-import numpy as np
-
 def visualize_road_points_on_map(csv_file="nancy_road_points.csv", output_html="nancy_road_points_map.html"):
     """
     Visualize all road points from CSV on an interactive map similar to visualize_panoids_on_map
@@ -213,6 +204,7 @@ def visualize_road_points_on_map(csv_file="nancy_road_points.csv", output_html="
     Returns:
         folium.Map: The created map object
     """
+    import folium
     
     try:
         # Read the CSV file
@@ -237,16 +229,24 @@ def visualize_road_points_on_map(csv_file="nancy_road_points.csv", output_html="
             tiles='OpenStreetMap'
         )
         
-        # Add road points as markers
-        for i, row in df.iterrows():
-            lat = row['latitude']
-            lon = row['longitude']
-            point_id = row['point_id']
-            distance_km = row.get('distance_from_center_km', 0)
-            road_segment = row.get('road_segment_id', 'unknown')
-            
-            # Create popup with information
-            popup_text = f"""
+        # Add all road points as a single GeoJSON layer instead of one
+        # folium object (and one JS object) per point
+        lats = df['latitude'].to_numpy()
+        lons = df['longitude'].to_numpy()
+        point_ids = df['point_id'].to_numpy()
+        distances_km = df['distance_from_center_km'].to_numpy() if 'distance_from_center_km' in df else np.zeros(len(df))
+        road_segments = df['road_segment_id'].to_numpy() if 'road_segment_id' in df else np.full(len(df), 'unknown')
+        
+        # Color points based on distance from center: <1 red, <2 orange, <3 yellow, else green
+        colors = np.array(['red', 'orange', 'yellow', 'green'])[np.digitize(distances_km, [1, 2, 3])]
+        
+        features = [
+            {
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+                'properties': {
+                    'color': color,
+                    'popup': f"""
             <div style="width: 250px;">
                 <b>Road Point {point_id}</b><br>
                 Latitude: {lat:.6f}<br>
@@ -256,32 +256,26 @@ def visualize_road_points_on_map(csv_file="nancy_road_points.csv", output_html="
                 <a href="https://www.google.com/maps/@{lat},{lon},3a,75y,0h,90t" target="_blank">View in Street View</a>
             </div>
             """
-            
-            # Color points based on distance from center
-            if distance_km < 1:
-                color = 'red'
-            elif distance_km < 2:
-                color = 'orange'
-            elif distance_km < 3:
-                color = 'yellow'
-            else:
-                color = 'green'
-            
-            # Add marker with smaller size for performance
-            folium.CircleMarker(
-                location=[lat, lon],
-                popup=popup_text,
-                radius=3,
-                color=color,
-                fill=True,
-                fillColor=color,
-                fillOpacity=0.7,
-                weight=1
-            ).add_to(map_viz)
-            
-            # Add progress indicator for large datasets
-            if (i + 1) % 1000 == 0:
-                print(f"   Added {i + 1}/{len(df)} points to map...")
+                }
+            }
+            for point_id, lat, lon, distance_km, road_segment, color in zip(
+                point_ids.tolist(), lats.tolist(), lons.tolist(),
+                distances_km.tolist(), road_segments.tolist(), colors.tolist()
+            )
+        ]
+        
+        folium.GeoJson(
+            {'type': 'FeatureCollection', 'features': features},
+            name='Road points',
+            marker=folium.CircleMarker(radius=3, fill=True, fill_opacity=0.7, weight=1),
+            style_function=lambda feature: {
+                'color': feature['properties']['color'],
+                'fillColor': feature['properties']['color'],
+                'fillOpacity': 0.7,
+                'weight': 1
+            },
+            popup=folium.GeoJsonPopup(fields=['popup'], labels=False)
+        ).add_to(map_viz)
         
         # Add Nancy center and boundary circle (same as in auto_walkthrough.py)
         nancy_center_lat = 48.693167
@@ -359,17 +353,13 @@ def calculate_average_spacing(df):
     
     # Sample first 100 points to estimate spacing
     sample_size = min(100, len(df) - 1)
-    total_distance = 0
+    lats = df['latitude'].to_numpy()[:sample_size + 1]
+    lons = df['longitude'].to_numpy()[:sample_size + 1]
     
-    for i in range(sample_size):
-        lat1, lon1 = df.iloc[i]['latitude'], df.iloc[i]['longitude']
-        lat2, lon2 = df.iloc[i + 1]['latitude'], df.iloc[i + 1]['longitude']
-        
-        # Approximate distance in meters
-        distance = ((lat2 - lat1)**2 + (lon2 - lon1)**2)**0.5 * 111000
-        total_distance += distance
+    # Approximate distance in meters
+    distances = np.hypot(np.diff(lats), np.diff(lons)) * 111000
     
-    return total_distance / sample_size
+    return distances.mean()
 
 def create_heatmap_visualization(csv_file="nancy_road_points.csv", output_html="nancy_road_heatmap.html"):
     """
@@ -384,6 +374,7 @@ def create_heatmap_visualization(csv_file="nancy_road_points.csv", output_html="
     """
     
     try:
+        import folium
         from folium.plugins import HeatMap
         
         # Read the CSV file
@@ -407,7 +398,11 @@ def create_heatmap_visualization(csv_file="nancy_road_points.csv", output_html="
         )
         
         # Prepare data for heatmap (lat, lon, weight)
-        heat_data = [[row['latitude'], row['longitude'], 1] for idx, row in df.iterrows()]
+        heat_data = np.column_stack([
+            df['latitude'].to_numpy(),
+            df['longitude'].to_numpy(),
+            np.ones(len(df))
+        ]).tolist()
         
         # Add heatmap layer
         HeatMap(heat_data, radius=15, blur=10, max_zoom=1).add_to(map_viz)
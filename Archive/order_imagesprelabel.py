@@ -1,8 +1,36 @@
 import os
-import random
 import csv
+import numpy as np
+from collections import Counter
 from pathlib import Path
 
+# Common image extensions to look for, compared against lower-cased names
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+def walk_files(root):
+    """
+    Recursively yield every file under root with a scandir-based walk
+    
+    DirEntry objects carry the file type from the directory listing, so
+    no stat() call is needed per file.
+    
+    Args:
+        root (str or Path): Directory to walk
+    
+    Yields:
+        tuple: (directory path, os.DirEntry of the file)
+    """
+    stack = [os.fspath(root)]
+    
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    yield directory, entry
+
 def create_shuffled_file_list():
     """
     Get all file names from ~/street_view_images directory, shuffle them,
@@ -20,18 +48,13 @@ def create_shuffled_file_list():
         print(f"❌ Directory does not exist: {street_view_dir}")
         return False
     
-    # Get all files from the directory
-    all_files = []
-    
-    # Common image extensions to look for
-    image_extensions = ['.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG']
-    
     try:
-        for file_path in street_view_dir.rglob('*'):
-            if file_path.is_file():
-                # Check if it's an image file
-                if any(file_path.name.endswith(ext) for ext in image_extensions):
-                    all_files.append(file_path.name)
+        # Get all image files from the directory
+        all_files = [
+            entry.name
+            for _, entry in walk_files(street_view_dir)
+            if entry.name.lower().endswith(IMAGE_EXTENSIONS)
+        ]
         
         if not all_files:
             print(f"❌ No image files found in {street_view_dir}")
@@ -39,20 +62,17 @@ def create_shuffled_file_list():
         
         print(f"📊 Found {len(all_files)} image files")
         
-        # Shuffle the list
-        random.shuffle(all_files)
+        # Shuffle the list (Fisher-Yates in C rather than Python-level swaps)
+        all_files = np.array(all_files, dtype=object)
+        np.random.default_rng().shuffle(all_files)
         print(f"🔀 Files shuffled randomly")
         
-        # Write to CSV file
-        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile)
-            
-            # Write header
-            writer.writerow(['filename'])
-            
-            # Write each filename
-            for filename in all_files:
-                writer.writerow([filename])
+        # Write to CSV file in one go: a single column of street view file
+        # names never contains commas or quotes, so no csv quoting is needed
+        with open(output_file, 'w', newline='', encoding='utf-8', buffering=1024 * 1024) as csvfile:
+            csvfile.write('filename\n')
+            csvfile.write('\n'.join(all_files))
+            csvfile.write('\n')
         
         print(f"✅ Successfully wrote {len(all_files)} filenames to {output_file}")
         print(f"📁 Output file: {output_file.absolute()}")
@@ -82,16 +102,16 @@ def create_shuffled_file_list_with_paths():
         print(f"❌ Directory does not exist: {street_view_dir}")
         return False
     
-    all_files = []
-    image_extensions = ['.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG']
+    # Prefix stripped from each entry path to get the relative path
+    root_prefix_length = len(os.path.join(street_view_dir, ''))
     
     try:
         # Walk through all subdirectories
-        for file_path in street_view_dir.rglob('*'):
-            if file_path.is_file() and any(file_path.name.endswith(ext) for ext in image_extensions):
-                # Get relative path from street_view_images directory
-                relative_path = file_path.relative_to(street_view_dir)
-                all_files.append(str(relative_path))
+        all_files = [
+            entry.path[root_prefix_length:]
+            for _, entry in walk_files(street_view_dir)
+            if entry.name.lower().endswith(IMAGE_EXTENSIONS)
+        ]
         
         if not all_files:
             print(f"❌ No image files found in {street_view_dir}")
@@ -99,20 +119,20 @@ def create_shuffled_file_list_with_paths():
         
         print(f"📊 Found {len(all_files)} image files")
         
-        # Shuffle the list
-        random.shuffle(all_files)
+        # Shuffle the list (Fisher-Yates in C rather than Python-level swaps)
+        all_files = np.array(all_files, dtype=object)
+        np.random.default_rng().shuffle(all_files)
         print(f"🔀 Files shuffled randomly")
         
-        # Write to CSV file
-        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        # Write to CSV file (paths may contain commas, so keep csv quoting)
+        with open(output_file, 'w', newline='', encoding='utf-8', buffering=1024 * 1024) as csvfile:
             writer = csv.writer(csvfile)
             
             # Write header
             writer.writerow(['relative_path'])
             
-            # Write each relative path
-            for filepath in all_files:
-                writer.writerow([filepath])
+            # Write all relative paths in one call, the row loop runs in C
+            writer.writerows([filepath] for filepath in all_files)
         
         print(f"✅ Successfully wrote {len(all_files)} file paths to {output_file}")
         print(f"📁 Output file: {output_file.absolute()}")
@@ -142,19 +162,19 @@ def analyze_street_view_directory():
     print("=" * 50)
     
     # Count files by extension
-    extension_counts = {}
-    total_files = 0
-    subdirs = set()
-    
-    for file_path in street_view_dir.rglob('*'):
-        if file_path.is_file():
-            total_files += 1
-            ext = file_path.suffix.lower()
-            extension_counts[ext] = extension_counts.get(ext, 0) + 1
-            
-            # Track subdirectories
-            if file_path.parent != street_view_dir:
-                subdirs.add(file_path.parent.relative_to(street_view_dir))
+    extension_counts = Counter()
+    file_directories = set()
+    
+    root = os.fspath(street_view_dir)
+    
+    for directory, entry in walk_files(root):
+        extension_counts[os.path.splitext(entry.name)[1].lower()] += 1
+        file_directories.add(directory)
+    
+    total_files = sum(extension_counts.values())
+    
+    # Track subdirectories, resolved once per directory rather than per file
+    subdirs = {os.path.relpath(directory, root) for directory in file_directories if directory != root}
     
     print(f"📊 Total files: {total_files}")
     print(f"📁 Subdirectories: {len(subdirs)}")
@@ -1,6 +1,45 @@
-import json
 import csv
 import os
+from collections import Counter
+import pandas as pd
+
+# ijson streams the features one at a time; without it the whole file is
+# parsed in one go with orjson
+try:
+    import ijson
+    JSONError = ijson.JSONError
+except ImportError:
+    import orjson
+    ijson = None
+    JSONError = orjson.JSONDecodeError
+
+# Rows are written out every CSV_BATCH_SIZE features instead of all at the end
+CSV_BATCH_SIZE = 1000
+
+# Write buffer for the output CSVs, large enough to keep write(2) calls rare
+CSV_BUFFER_SIZE = 1 << 20
+
+# Shared stand-in for missing or null GeoJSON members, never modified
+EMPTY = {}
+
+# Street View URL templates, filled with % formatting
+PANO_URL_TEMPLATE = "https://www.google.com/maps/@?api=1&map_action=pano&viewpoint=%s,%s"
+VIEW_URL_TEMPLATE = "https://www.google.com/maps/@%s,%s,3a,%sy,%sh,%st"
+
+def iter_features(f):
+    """
+    Yield the features of a GeoJSON FeatureCollection
+    
+    Args:
+        f (file): GeoJSON file opened in binary mode
+    
+    Yields:
+        dict: One feature at a time
+    """
+    if ijson is not None:
+        yield from ijson.items(f, 'features.item', use_float=True)
+    else:
+        yield from orjson.loads(f.read()).get('features', [])
 
 def convert_bike_parking_to_streetview_csv(json_file="bike_parking.json", output_csv="bike_parking_streetview.csv"):
     """
@@ -15,85 +54,77 @@ def convert_bike_parking_to_streetview_csv(json_file="bike_parking.json", output
     """
     
     try:
-        # Read the JSON file
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        print(f"📄 Loaded bike parking data from {json_file}")
-        
         # Prepare CSV data
-        csv_data = []
+        fieldnames = ['id', 'latitude', 'longitude', 'streetview_url', 'name', 
+                     'description', 'capacity', 'type', 'operator']
+        csv_batch = []
         processed_count = 0
         
-        # Process each feature in the GeoJSON
-        for feature in data.get('features', []):
-            try:
-                # Extract geometry coordinates
-                geometry = feature.get('geometry', {})
-                coordinates = geometry.get('coordinates', [])
+        print(f"📄 Streaming bike parking data from {json_file}")
+        
+        # Process each feature in the GeoJSON as it is parsed and write rows in
+        # batches, so neither the document nor the output is held in memory
+        with open(json_file, 'rb') as f, open(output_csv, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(fieldnames)
+            
+            for feature in iter_features(f):
+                # Extract geometry coordinates, null members count as empty
+                geometry = feature.get('geometry') or EMPTY
+                coordinates = geometry.get('coordinates')
                 
                 # Skip if no coordinates
                 if not coordinates:
                     continue
                 
                 # Handle different geometry types
-                if geometry.get('type') == 'Point':
+                geom_type = geometry.get('type')
+                if geom_type == 'Point':
                     # For Point: coordinates = [longitude, latitude]
+                    if len(coordinates) < 2:
+                        continue
                     longitude, latitude = coordinates[0], coordinates[1]
-                elif geometry.get('type') == 'MultiPoint':
+                elif geom_type == 'MultiPoint':
                     # For MultiPoint: take the first point
-                    if coordinates and len(coordinates[0]) >= 2:
-                        longitude, latitude = coordinates[0][0], coordinates[0][1]
-                    else:
+                    first_point = coordinates[0]
+                    if len(first_point) < 2:
                         continue
+                    longitude, latitude = first_point[0], first_point[1]
                 else:
                     # Skip other geometry types for now
                     continue
                 
                 # Extract properties for additional info
-                properties = feature.get('properties', {})
-                feature_id = feature.get('id', 'unknown')
-                
-                # Create Street View URL
-                streetview_url = f"https://www.google.com/maps/@?api=1&map_action=pano&viewpoint={latitude},{longitude}"
-                
-                # Create more complete Street View URL (without specific panoid)
-                streetview_url_simple = f"https://www.google.com/maps/@?api=1&map_action=pano&viewpoint={latitude},{longitude}"
+                get_property = (feature.get('properties') or EMPTY).get
                 
-                # Add to CSV data
-                csv_row = {
-                    'id': feature_id,
-                    'latitude': latitude,
-                    'longitude': longitude,
-                    'streetview_url': streetview_url_simple,
-                    'name': properties.get('name', ''),
-                    'description': properties.get('description', ''),
-                    'capacity': properties.get('capacity', ''),
-                    'type': properties.get('type', ''),
-                    'operator': properties.get('operator', ''),
-                    'location': f"{latitude},{longitude}"
-                }
-                
-                csv_data.append(csv_row)
+                # Add to CSV data as a positional row, in fieldnames order,
+                # with the Street View URL (without specific panoid)
+                csv_batch.append((
+                    feature.get('id', 'unknown'),
+                    latitude,
+                    longitude,
+                    PANO_URL_TEMPLATE % (latitude, longitude),
+                    get_property('name', ''),
+                    get_property('description', ''),
+                    get_property('capacity', ''),
+                    get_property('type', ''),
+                    get_property('operator', '')
+                ))
                 processed_count += 1
                 
-            except Exception as e:
-                print(f"❌ Error processing feature {feature.get('id', 'unknown')}: {e}")
-                continue
-        
-        # Write to CSV
-        if csv_data:
-            fieldnames = ['id', 'latitude', 'longitude', 'streetview_url', 'name', 
-                         'description', 'capacity', 'type', 'operator', 'location']
-            
-            with open(output_csv, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(csv_data)
+                if len(csv_batch) >= CSV_BATCH_SIZE:
+                    writer.writerows(csv_batch)
+                    csv_batch.clear()
             
+            # Write the last partial batch
+            writer.writerows(csv_batch)
+        
+        if processed_count:
             print(f"✅ Successfully created {output_csv} with {processed_count} bike parking locations")
             print(f"📊 Columns: {', '.join(fieldnames)}")
         else:
+            # Do not leave a header-only file behind
+            os.remove(output_csv)
             print("❌ No valid coordinates found in the JSON file")
             return 0
         
@@ -102,7 +133,7 @@ def convert_bike_parking_to_streetview_csv(json_file="bike_parking.json", output
     except FileNotFoundError:
         print(f"❌ File {json_file} not found")
         return 0
-    except json.JSONDecodeError as e:
+    except JSONError as e:
         print(f"❌ Error parsing JSON file: {e}")
         return 0
     except Exception as e:
@@ -123,7 +154,7 @@ def create_streetview_url_for_coordinates(latitude, longitude, heading=0, pitch=
     Returns:
         str: Google Street View URL
     """
-    return f"https://www.google.com/maps/@{latitude},{longitude},3a,{fov}y,{heading}h,{pitch}t"
+    return VIEW_URL_TEMPLATE % (latitude, longitude, fov, heading, pitch)
 
 def analyze_bike_parking_distribution(json_file="bike_parking.json"):
     """
@@ -136,49 +167,45 @@ def analyze_bike_parking_distribution(json_file="bike_parking.json"):
         dict: Analysis results
     """
     try:
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        features = data.get('features', [])
-        total_locations = len(features)
+        total_locations = 0
         
         # Count by geometry type
-        geometry_types = {}
+        geometry_types = Counter()
         coordinates_found = 0
         
         # Analyze properties
-        operators = {}
-        types = {}
+        operators = Counter()
+        types = Counter()
         capacities = []
         
-        for feature in features:
-            # Geometry analysis
-            geometry = feature.get('geometry', {})
-            geom_type = geometry.get('type', 'unknown')
-            geometry_types[geom_type] = geometry_types.get(geom_type, 0) + 1
-            
-            if geometry.get('coordinates'):
-                coordinates_found += 1
-            
-            # Properties analysis
-            properties = feature.get('properties', {})
-            
-            operator = properties.get('operator', 'unknown')
-            operators[operator] = operators.get(operator, 0) + 1
-            
-            bike_type = properties.get('type', 'unknown')
-            types[bike_type] = types.get(bike_type, 0) + 1
-            
-            capacity = properties.get('capacity')
-            if capacity and str(capacity).isdigit():
-                capacities.append(int(capacity))
+        # Stream the features one at a time instead of loading the whole file
+        with open(json_file, 'rb') as f:
+            for feature in iter_features(f):
+                total_locations += 1
+                
+                # Geometry analysis
+                geometry = feature.get('geometry', {})
+                geometry_types[geometry.get('type', 'unknown')] += 1
+                
+                if geometry.get('coordinates'):
+                    coordinates_found += 1
+                
+                # Properties analysis
+                properties = feature.get('properties', {})
+                
+                operators[properties.get('operator', 'unknown')] += 1
+                types[properties.get('type', 'unknown')] += 1
+                
+                capacity = properties.get('capacity')
+                if capacity and str(capacity).isdigit():
+                    capacities.append(int(capacity))
         
         analysis = {
             'total_locations': total_locations,
             'coordinates_found': coordinates_found,
-            'geometry_types': geometry_types,
-            'operators': operators,
-            'types': types,
+            'geometry_types': dict(geometry_types),
+            'operators': dict(operators),
+            'types': dict(types),
             'capacity_stats': {
                 'total_with_capacity': len(capacities),
                 'average_capacity': sum(capacities) / len(capacities) if capacities else 0,
@@ -205,48 +232,32 @@ def generate_streetview_urls_batch(coordinates_list, output_csv="streetview_urls
         int: Number of URLs generated
     """
     
-    csv_data = []
+    rows = [
+        (coords[2] if len(coords) > 2 else f"Location_{i+1}", coords[0], coords[1])
+        for i, coords in enumerate(coordinates_list)
+        if len(coords) >= 2
+    ]
     
-    for i, coords in enumerate(coordinates_list):
-        if len(coords) >= 2:
-            lat, lon = coords[0], coords[1]
-            name = coords[2] if len(coords) > 2 else f"Location_{i+1}"
-            
-            # Generate URLs with different viewing angles
-            urls = {
-                'north_view': create_streetview_url_for_coordinates(lat, lon, heading=0),
-                'east_view': create_streetview_url_for_coordinates(lat, lon, heading=90),
-                'south_view': create_streetview_url_for_coordinates(lat, lon, heading=180),
-                'west_view': create_streetview_url_for_coordinates(lat, lon, heading=270),
-                'default_view': create_streetview_url_for_coordinates(lat, lon)
-            }
-            
-            csv_row = {
-                'name': name,
-                'latitude': lat,
-                'longitude': lon,
-                'north_view_url': urls['north_view'],
-                'east_view_url': urls['east_view'],
-                'south_view_url': urls['south_view'],
-                'west_view_url': urls['west_view'],
-                'default_view_url': urls['default_view']
-            }
-            
-            csv_data.append(csv_row)
+    if not rows:
+        return 0
+    
+    # Build the URL columns for all locations at once instead of formatting
+    # four strings per row in Python
+    df = pd.DataFrame(rows, columns=['name', 'latitude', 'longitude'])
+    view_prefix = (
+        "https://www.google.com/maps/@" + df['latitude'].astype(str) + "," +
+        df['longitude'].astype(str) + ",3a,75y,"
+    )
+    for direction, heading in (('north', 0), ('east', 90), ('south', 180), ('west', 270)):
+        df[f'{direction}_view_url'] = view_prefix + f"{heading}h,0t"
     
     # Write to CSV
-    if csv_data:
-        fieldnames = ['name', 'latitude', 'longitude', 'north_view_url', 
-                     'east_view_url', 'south_view_url', 'west_view_url', 'default_view_url']
-        
-        with open(output_csv, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(csv_data)
-        
-        print(f"✅ Generated {output_csv} with {len(csv_data)} locations and multiple viewing angles")
+    with open(output_csv, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as csvfile:
+        df.to_csv(csvfile, index=False)
+    
+    print(f"✅ Generated {output_csv} with {len(df)} locations and multiple viewing angles")
     
-    return len(csv_data)
+    return len(df)
 
 if __name__ == "__main__":
     print("🚴 Swiss Bike Parking to Street View CSV Converter")
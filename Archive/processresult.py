@@ -1,7 +1,125 @@
 import folium
-import psycopg2
+import numpy as np
+import orjson
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from pathlib import Path
 
+# Connections are reused across calls instead of reconnecting every time,
+# the pool is opened on first use so importing this module needs no database
+_connection_pool = None
+
+def get_connection():
+    """
+    Take a connection from the module-wide pool, creating the pool if needed
+    
+    Returns:
+        connection: psycopg2 connection, give it back with release_connection()
+    """
+    global _connection_pool
+    if _connection_pool is None:
+        _connection_pool = ThreadedConnectionPool(
+            1, 8,
+            host="localhost",
+            database="imagedb",
+            user="arthur",
+            password=""
+        )
+    return _connection_pool.getconn()
+
+def release_connection(conn):
+    """
+    Return a connection to the pool, rolling back any unfinished transaction
+    
+    Args:
+        conn (connection): Connection obtained from get_connection()
+    """
+    _connection_pool.putconn(conn)
+
+# Builds the popup for each detection on the review map. Popups are built in
+# the browser when a marker is opened, so the page only carries the marker data
+POPUP_SCRIPT = """
+    function showDecision(statusDiv, isValid) {
+        statusDiv.style.display = 'block';
+        statusDiv.style.backgroundColor = isValid ? '#27ae60' : '#e74c3c';
+        statusDiv.style.color = 'white';
+        statusDiv.innerHTML = isValid ? '✅ Kept as valid' : '❌ Marked as invalid';
+        
+        // Disable buttons
+        const buttons = statusDiv.parentElement.querySelectorAll('button');
+        buttons.forEach(btn => {
+            btn.disabled = true;
+            btn.style.opacity = '0.5';
+            btn.style.cursor = 'not-allowed';
+        });
+    }
+    
+    function buildPopup(veloparkId, lat, lon, panoId) {
+        // Built once per marker, on its first opening, then reused by Leaflet
+        const popup = document.createElement('div');
+        popup.innerHTML = `
+        <div style="width: 350px; font-family: Arial, sans-serif;">
+            <div style="background-color: #f0f8ff; padding: 10px; border-radius: 5px; margin-bottom: 10px;">
+                <h4 style="margin: 0; color: #2c3e50;">🚴 Detection #${veloparkId}</h4>
+                <p style="margin: 5px 0; font-size: 12px; color: #7f8c8d;">
+                    AI Detection from Street View Analysis
+                </p>
+            </div>
+
+            <div style="margin-bottom: 15px;">
+                <p style="margin: 3px 0;"><strong>📍 Location:</strong> ${lat.toFixed(6)}, ${lon.toFixed(6)}</p>
+                <p style="margin: 3px 0;"><strong>🆔 Pano ID:</strong> ${panoId}</p>
+            </div>
+
+            <div style="margin-bottom: 15px;">
+                <a href="https://www.google.com/maps/@${lat},${lon},3a,75y,0h,90t/data=!3m4!1e1!3m2!1s${panoId}!2e0" 
+                   target="_blank" 
+                   style="display: inline-block; background-color: #4285f4; color: white; padding: 8px 12px; 
+                          text-decoration: none; border-radius: 4px; font-size: 14px; margin-right: 5px;">
+                    🗺️ View in Street View
+                </a>
+                <a href="https://www.google.com/maps/@${lat},${lon},19z" 
+                   target="_blank" 
+                   style="display: inline-block; background-color: #34a853; color: white; padding: 8px 12px; 
+                          text-decoration: none; border-radius: 4px; font-size: 14px;">
+                    🌍 View on Map
+                </a>
+            </div>
+
+            <div style="border-top: 1px solid #ddd; padding-top: 15px;">
+                <p style="margin: 0 0 10px 0; font-weight: bold; color: #2c3e50;">
+                    Review this detection:
+                </p>
+                <div style="display: flex; gap: 10px;">
+                    <button onclick="processDetection(${veloparkId}, true)" 
+                            style="flex: 1; background-color: #27ae60; color: white; border: none; 
+                                   padding: 10px; border-radius: 4px; cursor: pointer; font-size: 14px;">
+                        ✅ Keep (Valid)
+                    </button>
+                    <button onclick="processDetection(${veloparkId}, false)" 
+                            style="flex: 1; background-color: #e74c3c; color: white; border: none; 
+                                   padding: 10px; border-radius: 4px; cursor: pointer; font-size: 14px;">
+                        ❌ Reject (Invalid)
+                    </button>
+                </div>
+            </div>
+
+            <div id="status_${veloparkId}" style="margin-top: 10px; padding: 5px; border-radius: 3px; 
+                 text-align: center; font-size: 12px; display: none;">
+            </div>
+        </div>
+        `;
+        
+        // Show the decision already taken for this detection, if any
+        const decision = JSON.parse(localStorage.getItem('velopark_decisions') || '{}')[veloparkId];
+        if (decision) {
+            showDecision(popup.querySelector('#status_' + veloparkId), decision.is_valid);
+        }
+        return popup.firstElementChild;
+    }
+"""
+
 def create_velopark_review_html(output_file="velopark_review.html"):
     """
     Create an interactive HTML map for reviewing AI-detected bicycle parking locations.
@@ -11,39 +129,28 @@ def create_velopark_review_html(output_file="velopark_review.html"):
     cursor = None
     
     try:
-        # Connect to database
-        conn = psycopg2.connect(
-            host="localhost",
-            database="imagedb",
-            user="arthur",
-            password=""
-        )
+        # Borrow a pooled database connection
+        conn = get_connection()
         
         cursor = conn.cursor()
         
         # Create processed_data table if it doesn't exist
         create_processed_data_table(cursor, conn)
         
-        # Get all unprocessed velopark records (using id as unique identifier)
+        # Count the unprocessed records and calculate the center point
+        # (average of all coordinates) in the database
         cursor.execute("""
-            SELECT v.id, v.latitude, v.longitude, v.panoid
+            SELECT COUNT(*), AVG(v.latitude), AVG(v.longitude)
             FROM velopark v
-            LEFT JOIN processed_data pd ON v.id = pd.velopark_id
-            WHERE pd.velopark_id IS NULL
-            ORDER BY v.latitude DESC, v.longitude DESC
+            WHERE NOT EXISTS (SELECT 1 FROM processed_data pd WHERE pd.velopark_id = v.id)
         """)
+        record_count, avg_lat, avg_lon = cursor.fetchone()
         
-        records = cursor.fetchall()
-        
-        if not records:
+        if not record_count:
             print("📊 No unprocessed records found in velopark table")
             return
         
-        print(f"📊 Found {len(records)} unprocessed detections to review")
-        
-        # Calculate center point (average of all coordinates)
-        avg_lat = sum(record[1] for record in records) / len(records)
-        avg_lon = sum(record[2] for record in records) / len(records)
+        print(f"📊 Found {record_count} unprocessed detections to review")
         
         # Create map centered on average coordinates
         map_viz = folium.Map(
@@ -52,76 +159,63 @@ def create_velopark_review_html(output_file="velopark_review.html"):
             tiles='OpenStreetMap'
         )
         
-        # Add markers for each detection
-        for i, (velopark_id, lat, lon, pano_id) in enumerate(records):
-            
-            # Create popup with information and action buttons
-            popup_html = f"""
-            <div style="width: 350px; font-family: Arial, sans-serif;">
-                <div style="background-color: #f0f8ff; padding: 10px; border-radius: 5px; margin-bottom: 10px;">
-                    <h4 style="margin: 0; color: #2c3e50;">🚴 Detection #{velopark_id}</h4>
-                    <p style="margin: 5px 0; font-size: 12px; color: #7f8c8d;">
-                        AI Detection from Street View Analysis
-                    </p>
-                </div>
-                
-                <div style="margin-bottom: 15px;">
-                    <p style="margin: 3px 0;"><strong>📍 Location:</strong> {lat:.6f}, {lon:.6f}</p>
-                    <p style="margin: 3px 0;"><strong>🆔 Pano ID:</strong> {pano_id}</p>
-                </div>
-                
-                <div style="margin-bottom: 15px;">
-                    <a href="https://www.google.com/maps/@{lat},{lon},3a,75y,0h,90t/data=!3m4!1e1!3m2!1s{pano_id}!2e0" 
-                       target="_blank" 
-                       style="display: inline-block; background-color: #4285f4; color: white; padding: 8px 12px; 
-                              text-decoration: none; border-radius: 4px; font-size: 14px; margin-right: 5px;">
-                        🗺️ View in Street View
-                    </a>
-                    <a href="https://www.google.com/maps/@{lat},{lon},19z" 
-                       target="_blank" 
-                       style="display: inline-block; background-color: #34a853; color: white; padding: 8px 12px; 
-                              text-decoration: none; border-radius: 4px; font-size: 14px;">
-                        🌍 View on Map
-                    </a>
-                </div>
-                
-                <div style="border-top: 1px solid #ddd; padding-top: 15px;">
-                    <p style="margin: 0 0 10px 0; font-weight: bold; color: #2c3e50;">
-                        Review this detection:
-                    </p>
-                    <div style="display: flex; gap: 10px;">
-                        <button onclick="processDetection({velopark_id}, true)" 
-                                style="flex: 1; background-color: #27ae60; color: white; border: none; 
-                                       padding: 10px; border-radius: 4px; cursor: pointer; font-size: 14px;">
-                            ✅ Keep (Valid)
-                        </button>
-                        <button onclick="processDetection({velopark_id}, false)" 
-                                style="flex: 1; background-color: #e74c3c; color: white; border: none; 
-                                       padding: 10px; border-radius: 4px; cursor: pointer; font-size: 14px;">
-                            ❌ Reject (Invalid)
-                        </button>
-                    </div>
-                </div>
-                
-                <div id="status_{velopark_id}" style="margin-top: 10px; padding: 5px; border-radius: 3px; 
-                     text-align: center; font-size: 12px; display: none;">
-                </div>
-            </div>
-            """
-            
-            # Use blue markers for all detections (since we don't have confidence data)
-            folium.Marker(
-                location=[lat, lon],
-                popup=folium.Popup(popup_html, max_width=400),
-                tooltip=f"Detection #{velopark_id} | {pano_id}",
-                icon=folium.Icon(color='blue', icon='info-sign')
-            ).add_to(map_viz)
+        # Stream the unprocessed velopark records (using id as unique identifier)
+        # through a server-side cursor instead of fetching them all at once
+        records = conn.cursor(name='velopark_stream')
+        records.itersize = 2000
+        records.execute("""
+            SELECT v.id, v.latitude, v.longitude, v.panoid
+            FROM velopark v
+            WHERE NOT EXISTS (SELECT 1 FROM processed_data pd WHERE pd.velopark_id = v.id)
+            ORDER BY v.latitude DESC, v.longitude DESC
+        """)
+        
+        # Collect the marker data, the markers are created by one client-side
+        # loop instead of a folium.Marker each
+        coords = []
+        meta = []
+        for velopark_id, lat, lon, pano_id in records:
+            coords.append((lat, lon))
+            meta.append((velopark_id, pano_id))
+        records.close()
+        
+        # 6 decimals (~0.1 m) is plenty for Street View and keeps the page small
+        markers = orjson.dumps(
+            {'coords': np.round(np.array(coords, dtype=np.float64), 6), 'meta': meta},
+            option=orjson.OPT_SERIALIZE_NUMPY
+        ).decode()
+        
+        markers_code = """
+        <script>
+        """ + POPUP_SCRIPT + """
+        const MARKERS = """ + markers.replace('</', '<\\/') + """;
+        
+        window.addEventListener('load', function() {
+            // Same blue info-sign marker as folium.Icon(color='blue', icon='info-sign')
+            const markerIcon = L.AwesomeMarkers.icon({
+                markerColor: 'blue', iconColor: 'white', icon: 'info-sign', prefix: 'glyphicon'
+            });
+            MARKERS.coords.forEach(function(c, i) {
+                const [veloparkId, panoId] = MARKERS.meta[i];
+                let popup = null;
+                L.marker(c, {icon: markerIcon})
+                    .bindPopup(function() {
+                        return popup || (popup = buildPopup(veloparkId, c[0], c[1], panoId));
+                    }, {maxWidth: 400})
+                    .bindTooltip('Detection #' + veloparkId + ' | ' + panoId, {sticky: true})
+                    .addTo(""" + map_viz.get_name() + """);
+            });
+        });
+        </script>
+        """
+        map_viz.get_root().html.add_child(folium.Element(markers_code))
         
         # Add JavaScript for handling button clicks
         javascript_code = """
         <script>
-        let processedCount = 0;
-        const totalDetections = """ + str(len(records)) + """;
+        // Ids of the detections of this map with a decision, the progress count
+        const decidedIds = new Set();
+        const totalDetections = """ + str(record_count) + """;
         
         function processDetection(veloparkId, isValid) {
             const statusDiv = document.getElementById('status_' + veloparkId);
@@ -134,21 +228,12 @@ def create_velopark_review_html(output_file="velopark_review.html"):
             
             // For local file testing, simulate the backend response
             setTimeout(() => {
-                processedCount++;
-                statusDiv.style.backgroundColor = isValid ? '#27ae60' : '#e74c3c';
-                statusDiv.innerHTML = isValid ? '✅ Kept as valid' : '❌ Marked as invalid';
+                showDecision(statusDiv, isValid);
                 
                 // Update progress
+                decidedIds.add(String(veloparkId));
                 updateProgress();
                 
-                // Disable buttons
-                const buttons = statusDiv.parentElement.querySelectorAll('button');
-                buttons.forEach(btn => {
-                    btn.disabled = true;
-                    btn.style.opacity = '0.5';
-                    btn.style.cursor = 'not-allowed';
-                });
-                
                 // Store decision in localStorage for persistence
                 const decisions = JSON.parse(localStorage.getItem('velopark_decisions') || '{}');
                 decisions[veloparkId] = {
@@ -163,6 +248,7 @@ def create_velopark_review_html(output_file="velopark_review.html"):
         function updateProgress() {
             const progressDiv = document.getElementById('progress-info');
             if (progressDiv) {
+                const processedCount = decidedIds.size;
                 const percentage = Math.round((processedCount / totalDetections) * 100);
                 progressDiv.innerHTML = `Progress: ${processedCount}/${totalDetections} (${percentage}%)`;
                 
@@ -205,25 +291,13 @@ def create_velopark_review_html(output_file="velopark_review.html"):
             window.URL.revokeObjectURL(url);
         }
         
-        // Load previous decisions from localStorage
+        // Count the previous decisions from localStorage, the popups show
+        // them when they are built
         window.onload = function() {
             const decisions = JSON.parse(localStorage.getItem('velopark_decisions') || '{}');
-            Object.entries(decisions).forEach(([veloparkId, decision]) => {
-                const statusDiv = document.getElementById('status_' + veloparkId);
-                if (statusDiv) {
-                    statusDiv.style.display = 'block';
-                    statusDiv.style.backgroundColor = decision.is_valid ? '#27ae60' : '#e74c3c';
-                    statusDiv.innerHTML = decision.is_valid ? '✅ Kept as valid' : '❌ Marked as invalid';
-                    
-                    // Disable buttons
-                    const buttons = statusDiv.parentElement.querySelectorAll('button');
-                    buttons.forEach(btn => {
-                        btn.disabled = true;
-                        btn.style.opacity = '0.5';
-                        btn.style.cursor = 'not-allowed';
-                    });
-                    
-                    processedCount++;
+            MARKERS.meta.forEach(([veloparkId]) => {
+                if (decisions[veloparkId]) {
+                    decidedIds.add(String(veloparkId));
                 }
             });
             updateProgress();
@@ -239,17 +313,18 @@ def create_velopark_review_html(output_file="velopark_review.html"):
         <div style="position: fixed; top: 10px; right: 10px; background-color: #3498db; 
              color: white; padding: 10px; border-radius: 5px; z-index: 1000; 
              font-family: Arial, sans-serif;">
-            <div id="progress-info">Progress: 0/{len(records)} (0%)</div>
+            <div id="progress-info">Progress: 0/{record_count} (0%)</div>
         </div>
         """
         map_viz.get_root().html.add_child(folium.Element(progress_html))
         
-        # Save the map
+        # Save the map, rendered once and written through a 1 MiB buffer
         output_path = Path(output_file)
-        map_viz.save(str(output_path))
+        with open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as html_file:
+            html_file.write(map_viz.get_root().render())
         
         print(f"✅ Interactive review map created: {output_path.absolute()}")
-        print(f"📊 {len(records)} detections ready for review")
+        print(f"📊 {record_count} detections ready for review")
         print(f"🌐 Open {output_file} in your web browser to start reviewing")
         print(f"💾 Decisions will be saved locally and can be exported as CSV")
         
@@ -263,7 +338,7 @@ def create_velopark_review_html(output_file="velopark_review.html"):
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            release_connection(conn)
 
 def create_processed_data_table(cursor, conn):
     """
@@ -281,11 +356,9 @@ def create_processed_data_table(cursor, conn):
             );
         """)
         
-        # Create index for faster lookups
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_processed_data_velopark_id 
-            ON processed_data(velopark_id);
-        """)
+        # UNIQUE(velopark_id) already indexes the lookups and the unprocessed
+        # anti-join, a second index on the column only slows down every insert
+        cursor.execute("DROP INDEX IF EXISTS idx_processed_data_velopark_id;")
         
         conn.commit()
         print("✅ processed_data table ready")
@@ -307,36 +380,42 @@ def import_decisions_from_csv(csv_file_path):
     cursor = None
     
     try:
-        conn = psycopg2.connect(
-            host="localhost",
-            database="imagedb",
-            user="arthur",
-            password=""
-        )
+        conn = get_connection()
         
         cursor = conn.cursor()
         
         # Create processed_data table if needed
         create_processed_data_table(cursor, conn)
         
-        imported_count = 0
-        
-        with open(csv_file_path, 'r') as csvfile:
-            reader = csv.DictReader(csvfile)
+        with open(csv_file_path, 'r', newline='') as csvfile:
+            header = next(csv.reader([csvfile.readline()]))
+            columns = sql.SQL(', ').join(map(sql.Identifier, header))
             
-            for row in reader:
-                velopark_id = int(row['velopark_id'])
-                is_valid = row['is_valid'].lower() == 'true'
-                
-                cursor.execute("""
-                    INSERT INTO processed_data (velopark_id, is_valid)
-                    VALUES (%s, %s)
-                    ON CONFLICT (velopark_id) DO UPDATE SET
-                        is_valid = EXCLUDED.is_valid,
-                        reviewed_at = CURRENT_TIMESTAMP
-                """, (velopark_id, is_valid))
-                
-                imported_count += 1
+            # Stage the raw rows as text in file order and let COPY load the
+            # rest of the file, the database then does the parsing
+            cursor.execute(sql.SQL("""
+                CREATE TEMP TABLE decisions_import (line BIGSERIAL, {}) ON COMMIT DROP
+            """).format(sql.SQL(', ').join(
+                sql.SQL('{} TEXT').format(sql.Identifier(name)) for name in header
+            )))
+            cursor.copy_expert(
+                sql.SQL("COPY decisions_import ({}) FROM STDIN WITH (FORMAT csv)").format(columns).as_string(cursor),
+                csvfile
+            )
+            imported_count = cursor.rowcount
+        
+        # A repeated id keeps its last decision, one statement cannot
+        # update the same row twice
+        cursor.execute("""
+            INSERT INTO processed_data (velopark_id, is_valid)
+            SELECT DISTINCT ON (velopark_id::INTEGER)
+                velopark_id::INTEGER, COALESCE(LOWER(is_valid) = 'true', false)
+            FROM decisions_import
+            ORDER BY velopark_id::INTEGER, line DESC
+            ON CONFLICT (velopark_id) DO UPDATE SET
+                is_valid = EXCLUDED.is_valid,
+                reviewed_at = CURRENT_TIMESTAMP
+        """)
         
         conn.commit()
         print(f"✅ Imported {imported_count} decisions to database")
@@ -350,7 +429,7 @@ def import_decisions_from_csv(csv_file_path):
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            release_connection(conn)
 
 def process_detection_decision(velopark_id, is_valid, notes=None):
     """
@@ -368,12 +447,7 @@ def process_detection_decision(velopark_id, is_valid, notes=None):
     cursor = None
     
     try:
-        conn = psycopg2.connect(
-            host="localhost",
-            database="imagedb",
-            user="arthur",
-            password=""
-        )
+        conn = get_connection()
         
         cursor = conn.cursor()
         
@@ -402,7 +476,7 @@ def process_detection_decision(velopark_id, is_valid, notes=None):
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            release_connection(conn)
 
 def get_review_statistics():
     """
@@ -412,27 +486,20 @@ def get_review_statistics():
     cursor = None
     
     try:
-        conn = psycopg2.connect(
-            host="localhost",
-            database="imagedb",
-            user="arthur",
-            password=""
-        )
+        conn = get_connection()
         
         cursor = conn.cursor()
         
-        # Get overall statistics
-        cursor.execute("SELECT COUNT(*) FROM velopark")
-        total_detections = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM processed_data")
-        reviewed_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM processed_data WHERE is_valid = true")
-        valid_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM processed_data WHERE is_valid = false")
-        invalid_count = cursor.fetchone()[0]
+        # Get overall statistics in a single round-trip
+        cursor.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM velopark),
+                COUNT(*),
+                COUNT(*) FILTER (WHERE is_valid = true),
+                COUNT(*) FILTER (WHERE is_valid = false)
+            FROM processed_data
+        """)
+        total_detections, reviewed_count, valid_count, invalid_count = cursor.fetchone()
         
         pending_count = total_detections - reviewed_count
         
@@ -464,7 +531,7 @@ def get_review_statistics():
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            release_connection(conn)
 
 # Example usage and testing functions
 def batch_process_decisions(decisions):
@@ -474,10 +541,41 @@ def batch_process_decisions(decisions):
     Args:
         decisions (list): List of tuples (velopark_id, is_valid, notes)
     """
+    conn = None
+    cursor = None
     success_count = 0
-    for velopark_id, is_valid, notes in decisions:
-        if process_detection_decision(velopark_id, is_valid, notes):
-            success_count += 1
+    
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        # A repeated id keeps its last decision, one statement cannot
+        # update the same row twice
+        latest = {velopark_id: (velopark_id, is_valid, notes) for velopark_id, is_valid, notes in decisions}
+        
+        # All decisions in multi-row upserts and a single commit
+        execute_values(cursor, """
+            INSERT INTO processed_data (velopark_id, is_valid, notes)
+            VALUES %s
+            ON CONFLICT (velopark_id) DO UPDATE SET
+                is_valid = EXCLUDED.is_valid,
+                reviewed_at = CURRENT_TIMESTAMP,
+                notes = EXCLUDED.notes
+        """, list(latest.values()), page_size=1000)
+        
+        conn.commit()
+        success_count = len(decisions)
+        
+    except Exception as e:
+        print(f"❌ Error processing decisions: {e}")
+        if conn:
+            conn.rollback()
+    
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            release_connection(conn)
     
     print(f"✅ Processed {success_count}/{len(decisions)} decisions successfully")
 
@@ -1,17 +1,142 @@
+import os
 import psycopg2
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 import time
 import sys
 from pathlib import Path
 from selenium import webdriver
 from selenium.webdriver.firefox.service import Service
 from selenium.webdriver.firefox.options import Options
-from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.firefox import GeckoDriverManager
+from webdriver_manager.core.driver_cache import DriverCacheManager
 import threading
+import queue
+from itertools import islice
 
+# Connections are reused across calls instead of reconnecting every time,
+# the pool is opened on first use so importing this module needs no database
+_connection_pool = None
+
+def get_connection():
+    """
+    Take a connection from the module-wide pool, creating the pool if needed
+    
+    Falls back to a direct connection when every pooled connection is in use.
+    
+    Returns:
+        connection: psycopg2 connection, give it back with release_connection()
+    """
+    global _connection_pool
+    if _connection_pool is None:
+        _connection_pool = ThreadedConnectionPool(
+            1, 8,
+            host="localhost",
+            database="imagedb",
+            user="arthur",
+            password=""
+        )
+    try:
+        return _connection_pool.getconn()
+    except PoolError:
+        return psycopg2.connect(
+            host="localhost",
+            database="imagedb",
+            user="arthur",
+            password=""
+        )
+
+def release_connection(conn):
+    """
+    Return a connection to the pool, rolling back any unfinished transaction
+    
+    Args:
+        conn (connection): Connection obtained from get_connection()
+    """
+    try:
+        _connection_pool.putconn(conn)
+    except PoolError:
+        # Direct connection opened while the pool was exhausted
+        conn.close()
+
+# Firefox profile shared by the review and --prefetch sessions, so panoramas
+# fetched ahead of time are served from its cache during review
+PROFILE_DIR = Path.home() / ".cache" / "velopark" / "firefox-profile"
+
+# Windows loading panoramas at the same time during --prefetch
+PREFETCH_WINDOWS = 4
+
+# Where the resolved GeckoDriver path is remembered between runs
+DRIVER_CACHE_DIR = Path.home() / ".cache" / "velopark"
+DRIVER_PATH_FILE = DRIVER_CACHE_DIR / ".geckodriver_path"
+
+def get_geckodriver_path():
+    """
+    Locate GeckoDriver, downloading it only when no known copy exists
+    
+    GeckoDriverManager().install() asks GitHub for the latest release on every
+    call, even when the driver is already on disk. The path is taken from the
+    GECKODRIVER_PATH environment variable or from the path saved by a previous
+    run, and the manager is only used when neither points to a file.
+    
+    Returns:
+        str: Path of the geckodriver executable
+    """
+    driver_path = os.environ.get("GECKODRIVER_PATH")
+    if driver_path and os.path.isfile(driver_path):
+        return driver_path
+    
+    if DRIVER_PATH_FILE.is_file():
+        driver_path = DRIVER_PATH_FILE.read_text().strip()
+        if os.path.isfile(driver_path):
+            return driver_path
+    
+    cache_manager = DriverCacheManager(root_dir=str(DRIVER_CACHE_DIR), valid_range=365)
+    driver_path = GeckoDriverManager(cache_manager=cache_manager).install()
+    
+    DRIVER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    DRIVER_PATH_FILE.write_text(driver_path)
+    return driver_path
+
+def use_shared_profile(firefox_options):
+    """
+    Run Firefox on the persistent review profile instead of a throwaway one
+    
+    Args:
+        firefox_options (Options): Firefox options to update
+    """
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    firefox_options.add_argument("-profile")
+    firefox_options.add_argument(str(PROFILE_DIR))
+
+def build_street_view_url(latitude, longitude, panoid):
+    """
+    Google Maps Street View URL of a detection's panorama
+    """
+    return f"https://www.google.com/maps/@{latitude},{longitude},3a,75y,0h,90t/data=!3m4!1e1!3m2!1s{panoid}!2e0"
+
+# Async script that completes with the keyboard decision and clears it. If no
+# key was pressed yet, the keyboard listener completes it through __reviewCb,
+# so the WebDriver call blocks until then instead of being polled
+WAIT_DECISION_SCRIPT = """
+    var done = arguments[arguments.length - 1];
+    function take() {
+        var d = window.reviewDecision;
+        window.reviewDecision = null;
+        window.reviewDecisionReady = false;
+        window.__reviewCb = null;
+        done(d);
+    }
+    if (window.reviewDecisionReady) {
+        take();
+    } else {
+        window.__reviewCb = take;
+    }
+"""
 
 def create_selenium_review_system():
     """
@@ -22,24 +147,30 @@ def create_selenium_review_system():
     firefox_options = Options()
     # firefox_options.add_argument("--headless")  # Keep commented for interactive use
     
+    # Return from navigation at DOMContentLoaded, wait_for_street_view() waits
+    # for the panorama itself rather than every tile and tracking request
+    firefox_options.page_load_strategy = "eager"
+    firefox_options.set_preference("dom.ipc.processCount", 1)
+    firefox_options.set_preference("browser.cache.disk.enable", True)
+    use_shared_profile(firefox_options)
+    
     # Setup WebDriver with automatic driver management
-    service = Service(GeckoDriverManager().install())
+    service = Service(get_geckodriver_path())
     driver = webdriver.Firefox(service=service, options=firefox_options)
     
     # Database connection
     conn = None
-    cursor = None
+    detections = None
+    writer = None
     
     try:
         # Connect to database
-        conn = psycopg2.connect(
-            host="localhost",
-            database="imagedb",
-            user="arthur",
-            password=""
-        )
+        conn = get_connection()
         
-        cursor = conn.cursor()
+        # Decisions are saved by a background thread on its own connection
+        decision_queue = queue.Queue()
+        writer = threading.Thread(target=write_decisions, args=(decision_queue,))
+        writer.start()
         
         
         print("🚀 Starting Selenium Review System")
@@ -55,19 +186,22 @@ def create_selenium_review_system():
         current_detection = None
         consent_handled = False  # Track if we've handled consent
         
+        # Two tabs take turns: while a detection is reviewed in one, the next
+        # one is loaded in the other
+        tabs = [driver.current_window_handle]
+        driver.switch_to.new_window('tab')
+        tabs.append(driver.current_window_handle)
+        driver.switch_to.window(tabs[0])
+        current_tab = 0
+        maps_loaded = [False, False]  # Whether each tab has Maps open to swap panoramas in
+        preloaded = False  # Whether the other tab already shows the next detection
+        preload_swapped = False  # Whether that preload swapped the panorama in place
+        
+        # Unprocessed detections, fetched once and streamed in batches
+        detections = iter_unprocessed_detections(conn)
+        result = next(detections, None)
+        
         while True:
-            # Get the next unprocessed detection
-            cursor.execute("""
-                SELECT v.id, v.latitude, v.longitude, v.panoid
-                FROM velopark v
-                LEFT JOIN processed_data pd ON v.id = pd.velopark_id
-                WHERE pd.velopark_id IS NULL
-                ORDER BY v.id
-                LIMIT 1
-            """)
-            
-            result = cursor.fetchone()
-            
             if not result:
                 print("✅ All detections have been processed!")
                 break
@@ -81,44 +215,55 @@ def create_selenium_review_system():
             }
             
             # Create Street View URL
-            street_view_url = f"https://www.google.com/maps/@{latitude},{longitude},3a,75y,0h,90t/data=!3m4!1e1!3m2!1s{panoid}!2e0"
+            street_view_url = build_street_view_url(latitude, longitude, panoid)
             
             print(f"\n📍 Detection #{velopark_id}")
             print(f"   Location: {latitude:.6f}, {longitude:.6f}")
             print(f"   Pano ID: {panoid}")
             print(f"   URL: {street_view_url}")
             
-            # Navigate to Street View
-            driver.get(street_view_url)
+            if preloaded:
+                # Loaded in the other tab during the previous review
+                current_tab = 1 - current_tab
+                driver.switch_to.window(tabs[current_tab])
+                swapped = preload_swapped
+            else:
+                # Navigate to Street View, inside the loaded Maps app when possible
+                swapped = show_street_view(driver, street_view_url, maps_loaded[current_tab])
+                maps_loaded[current_tab] = True
             
-            # Wait for page to load
-            try:
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
-                time.sleep(2)  # Initial wait for page elements
-            except:
-                print("⚠️  Page load timeout, continuing...")
+            # The canvas of the previous panorama is still there after a swap, so
+            # check that Maps really moved before the decision is taken for this id
+            if swapped and not panorama_shown(driver, panoid):
+                print("⚠️  Maps kept the previous panorama, reloading...")
+                driver.get(street_view_url)
             
             # Handle Google consent page (only on first load)
             if not consent_handled:
                 print("🔄 Handling Google consent page...")
                 handle_google_consent(driver)
                 consent_handled = True
-                # Additional wait after consent handling
-                time.sleep(3)
-            else:
-                # Regular wait for subsequent pages
-                time.sleep(1)
             
-            # Wait a bit more for Street View to fully load
-            time.sleep(2)
+            # Wait until Street View is actually drawn instead of fixed pauses
+            wait_for_street_view(driver)
             
-            # Inject keyboard listener with more robust approach
-            inject_robust_keyboard_listener(driver)
-            
-            # Update the detection info in the page
-            update_detection_info(driver, current_detection, processed_count)
+            # Update the detection info in the page. A missing panel means the
+            # document was reloaded, which also dropped the keyboard listener
+            if not refresh_panel(driver, current_detection, processed_count):
+                inject_robust_keyboard_listener(driver)
+                install_panel(driver)
+                refresh_panel(driver, current_detection, processed_count)
+            
+            # Get the next unprocessed detection and start loading it in the
+            # other tab while this one is reviewed
+            result = next(detections, None)
+            preloaded = result is not None
+            if preloaded:
+                other_tab = 1 - current_tab
+                driver.switch_to.window(tabs[other_tab])
+                preload_swapped = show_street_view(driver, build_street_view_url(*result[1:]), maps_loaded[other_tab])
+                maps_loaded[other_tab] = True
+                driver.switch_to.window(tabs[current_tab])
             
             print(f"🎯 Ready for review. Press 'y' (valid), 'n' (invalid), 's' (skip), or 'q' (quit)")
             
@@ -134,20 +279,16 @@ def create_selenium_review_system():
             elif decision in ['valid', 'invalid']:
                 is_valid = (decision == 'valid')
                 
-                # Process the decision
-                success = process_detection_decision_db(
-                    cursor, conn, velopark_id, is_valid
-                )
+                # The writer stops on a database error, queued decisions
+                # would then be lost without notice
+                if not writer.is_alive():
+                    print(f"❌ Decision for detection #{velopark_id} not saved: the database writer stopped")
+                    print("💾 Stopping the review, restart it once the database is reachable")
+                    break
                 
-                if success:
-                    processed_count += 1
-                    status = "✅ VALID" if is_valid else "❌ INVALID"
-                    print(f"{status} - Detection {velopark_id} processed successfully")
-                else:
-                    print(f"⚠️  Failed to process detection {velopark_id}")
-            
-            # Small delay before next detection
-            time.sleep(1)
+                # Queue the decision and go on to the next detection
+                decision_queue.put((velopark_id, is_valid))
+                processed_count += 1
         
         print(f"\n🎉 Review session complete!")
         print(f"📊 Total detections processed: {processed_count}")
@@ -160,10 +301,20 @@ def create_selenium_review_system():
         print(f"❌ Error in review system: {e}")
     
     finally:
-        if cursor:
-            cursor.close()
+        if writer:
+            # Let the writer save the queued decisions before leaving
+            decision_queue.put(None)
+            writer.join()
+            
+            # Anything still queued was left by a writer that stopped on an error
+            while not decision_queue.empty():
+                decision = decision_queue.get()
+                if decision:
+                    print(f"⚠️  Decision for detection {decision[0]} not saved")
+        if detections:
+            detections.close()
         if conn:
-            conn.close()
+            release_connection(conn)
         
         try:
             driver.quit()
@@ -173,11 +324,17 @@ def create_selenium_review_system():
 def inject_robust_keyboard_listener(driver):
     """
     Inject a more robust JavaScript keyboard listener that works with Google Maps
+    
+    The listener is installed once per document, calling this again on the same
+    page does nothing, so listeners do not pile up over a review session.
     """
     keyboard_script = """
-    // Remove any existing listeners
-    if (window.reviewKeyboardListener) {
-        document.removeEventListener('keydown', window.reviewKeyboardListener);
+    // Already listening in this document
+    if (window.__velokbInstalled) return;
+    
+    // Remove a previous instance of the listener, if any
+    if (window.__velokbFn) {
+        window.removeEventListener('keydown', window.__velokbFn, true);
     }
     
     // Reset decision state
@@ -185,7 +342,7 @@ def inject_robust_keyboard_listener(driver):
     window.reviewDecisionReady = false;
     
     // Create the keyboard listener function
-    window.reviewKeyboardListener = function(event) {
+    window.__velokbFn = function(event) {
         const key = event.key.toLowerCase();
         
         // Only handle our specific keys
@@ -228,16 +385,17 @@ def inject_robust_keyboard_listener(driver):
                                                   key === 's' ? '#f39c12' : '#95a5a6';
             }
             
+            // Hand the decision to a waiting wait_for_user_decision()
+            if (window.__reviewCb) window.__reviewCb();
+            
             return false; // Prevent any further handling
         }
     };
     
-    // Add listener with capture=true to catch events before Google Maps
-    document.addEventListener('keydown', window.reviewKeyboardListener, true);
-    
-    // Also add to window and body for redundancy
-    window.addEventListener('keydown', window.reviewKeyboardListener, true);
-    document.body.addEventListener('keydown', window.reviewKeyboardListener, true);
+    // Capturing on window runs before any handler of the page, Google Maps
+    // included, and survives Maps replacing document.body
+    window.addEventListener('keydown', window.__velokbFn, {capture: true, passive: false});
+    window.__velokbInstalled = true;
     
     console.log('🎹 Robust keyboard listener activated');
     console.log('Press: y=valid, n=invalid, s=skip, q=quit');
@@ -247,13 +405,17 @@ def inject_robust_keyboard_listener(driver):
     """
     
     driver.execute_script(keyboard_script)
-    
-    # Give some time for the script to take effect
-    time.sleep(0.5)
 
 def wait_for_user_decision(driver, timeout=300):
     """
     Wait for user to make a decision via keyboard with better debugging
+    
+    Args:
+        driver: Selenium WebDriver instance
+        timeout: Maximum wait time in seconds
+    
+    Returns:
+        str: User decision ('valid', 'invalid', 'skip', 'quit')
     """
     start_time = time.time()
     
@@ -261,21 +423,12 @@ def wait_for_user_decision(driver, timeout=300):
     
     while time.time() - start_time < timeout:
         try:
-            # Check if decision is ready
-            decision_ready = driver.execute_script("return window.reviewDecisionReady;")
+            # Blocks until a key is pressed or the remaining time runs out
+            driver.set_script_timeout(timeout - (time.time() - start_time))
+            return driver.execute_async_script(WAIT_DECISION_SCRIPT)
             
-            if decision_ready:
-                decision = driver.execute_script("return window.reviewDecision;")
-                
-                # Reset for next iteration
-                driver.execute_script("""
-                    window.reviewDecision = null;
-                    window.reviewDecisionReady = false;
-                """)
-                
-                return decision
-            
-            time.sleep(0.1)
+        except TimeoutException:
+            break
             
         except Exception as e:
             print(f"⚠️  Error checking decision: {e}")
@@ -289,162 +442,91 @@ def wait_for_user_decision(driver, timeout=300):
     print("⏰ Timeout waiting for user decision, skipping...")
     return 'skip'
 
-# Add the rest of your existing functions (handle_google_consent, update_detection_info, etc.)
-# ... (keep all the other functions as they were)
+# Moves the loaded Maps app to another URL without reloading it: the position
+# and panorama live in the URL path, which Maps re-reads on popstate. The URLs
+# Maps writes itself are recorded in window.__veloMapsUrl, so panorama_shown()
+# can tell that Maps followed, which the pushed URL alone doesn't show
+SWAP_PANORAMA_SCRIPT = """
+    if (!window.__veloUrlHook) {
+        window.__veloUrlHook = true;
+        ['pushState', 'replaceState'].forEach(function(name) {
+            var original = history[name];
+            history[name] = function(state, title, url) {
+                if (url) window.__veloMapsUrl = String(url);
+                return original.apply(this, arguments);
+            };
+        });
+    }
+    history.pushState(null, '', arguments[0]);
+    window.__veloMapsUrl = null;
+    window.dispatchEvent(new PopStateEvent('popstate', {state: null}));
+"""
 
-def create_selenium_review_system():
+def show_street_view(driver, url, reuse_page):
     """
-    Create an interactive Selenium-based review system for velopark detections
+    Navigate to a Street View URL
+    
+    The first detection loads Maps normally. Later ones swap the panorama in
+    the already loaded app instead of reloading its scripts and WebGL scene.
+    
+    Args:
+        driver: Selenium WebDriver instance
+        url (str): Street View URL
+        reuse_page (bool): Whether a Maps page is already loaded
+    
+    Returns:
+        bool: True if the panorama was swapped in the loaded page, which
+            panorama_shown() should confirm, False if the page was loaded
     """
+    if reuse_page:
+        try:
+            driver.execute_script(SWAP_PANORAMA_SCRIPT, url)
+            return True
+        except WebDriverException:
+            print("⚠️  In-page navigation failed, reloading Maps...")
     
-    # Setup Firefox options
-    firefox_options = Options()
-    # firefox_options.add_argument("--headless")  # Keep commented for interactive use
+    driver.get(url)
+    return False
+
+def panorama_shown(driver, panoid, timeout=5):
+    """
+    Wait for Maps to move to a panorama swapped in by show_street_view()
     
-    # Setup WebDriver with automatic driver management
-    service = Service(GeckoDriverManager().install())
-    driver = webdriver.Firefox(service=service, options=firefox_options)
+    Maps rewrites the URL with the panorama it shows once it has loaded it.
     
-    # Database connection
-    conn = None
-    cursor = None
+    Args:
+        driver: Selenium WebDriver instance
+        panoid (str): Panorama that should be shown
+        timeout (int): Seconds to wait for Maps
     
+    Returns:
+        bool: True if Maps shows the panorama, False if it didn't follow
+    """
     try:
-        # Connect to database
-        conn = psycopg2.connect(
-            host="localhost",
-            database="imagedb",
-            user="arthur",
-            password=""
+        WebDriverWait(driver, timeout).until(
+            lambda d: f"!1s{panoid}" in (d.execute_script("return window.__veloMapsUrl") or "")
         )
-        
-        cursor = conn.cursor()
-        
-        
-        print("🚀 Starting Selenium Review System")
-        print("=" * 50)
-        print("Controls:")
-        print("  'y' key: Mark as VALID and delete from velopark")
-        print("  'n' key: Mark as INVALID and delete from velopark") 
-        print("  's' key: Skip this detection (no action)")
-        print("  'q' key: Quit the program")
-        print("=" * 50)
-        
-        processed_count = 0
-        current_detection = None
-        consent_handled = False  # Track if we've handled consent
-        
-        while True:
-            # Get the next unprocessed detection
-            cursor.execute("""
-                SELECT v.id, v.latitude, v.longitude, v.panoid
-                FROM velopark v
-                LEFT JOIN processed_data pd ON v.id = pd.velopark_id
-                WHERE pd.velopark_id IS NULL
-                ORDER BY v.id
-                LIMIT 1
-            """)
-            
-            result = cursor.fetchone()
-            
-            if not result:
-                print("✅ All detections have been processed!")
-                break
-            
-            velopark_id, latitude, longitude, panoid = result
-            current_detection = {
-                'id': velopark_id,
-                'latitude': latitude,
-                'longitude': longitude,
-                'panoid': panoid
-            }
-            
-            # Create Street View URL
-            street_view_url = f"https://www.google.com/maps/@{latitude},{longitude},3a,75y,0h,90t/data=!3m4!1e1!3m2!1s{panoid}!2e0"
-            
-            print(f"\n📍 Detection #{velopark_id}")
-            print(f"   Location: {latitude:.6f}, {longitude:.6f}")
-            print(f"   Pano ID: {panoid}")
-            print(f"   URL: {street_view_url}")
-            
-            # Navigate to Street View
-            driver.get(street_view_url)
-            
-            # Wait for page to load
-            try:
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
-                time.sleep(2)  # Initial wait for page elements
-            except:
-                print("⚠️  Page load timeout, continuing...")
-            
-            # Handle Google consent page (only on first load)
-            if not consent_handled:
-                print("🔄 Handling Google consent page...")
-                handle_google_consent(driver)
-                consent_handled = True
-                # Additional wait after consent handling
-                time.sleep(3)
-            else:
-                # Regular wait for subsequent pages
-                time.sleep(1)
-            
-            # Inject keyboard listener
-            inject_keyboard_listener(driver)
-            
-            # Update the detection info in the page
-            update_detection_info(driver, current_detection, processed_count)
-            
-            print(f"🎯 Ready for review. Press 'y' (valid), 'n' (invalid), 's' (skip), or 'q' (quit)")
-            
-            # Wait for user decision
-            decision = wait_for_user_decision(driver)
-            
-            if decision == 'quit':
-                print("👋 Exiting review system...")
-                break
-            elif decision == 'skip':
-                print("⏭️  Skipping this detection")
-                continue
-            elif decision in ['valid', 'invalid']:
-                is_valid = (decision == 'valid')
-                
-                # Process the decision
-                success = process_detection_decision_db(
-                    cursor, conn, velopark_id, is_valid
-                )
-                
-                if success:
-                    processed_count += 1
-                    status = "✅ VALID" if is_valid else "❌ INVALID"
-                    print(f"{status} - Detection {velopark_id} processed successfully")
-                else:
-                    print(f"⚠️  Failed to process detection {velopark_id}")
-            
-            # Small delay before next detection
-            time.sleep(1)
-        
-        print(f"\n🎉 Review session complete!")
-        print(f"📊 Total detections processed: {processed_count}")
-        
-    except KeyboardInterrupt:
-        print(f"\n⏹️  Review interrupted by user")
-        print(f"📊 Processed {processed_count} detections in this session")
-    
-    except Exception as e:
-        print(f"❌ Error in review system: {e}")
+        return True
+    except (TimeoutException, WebDriverException):
+        return False
+
+def wait_for_street_view(driver):
+    """
+    Wait for the page to be parsed and the Street View canvas to appear
     
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
-        
-        try:
-            driver.quit()
-        except:
-            pass
+    Args:
+        driver: Selenium WebDriver instance
+    """
+    try:
+        # Both checks in one script call per poll
+        WebDriverWait(driver, 15).until(
+            lambda d: d.execute_script(
+                "return document.readyState !== 'loading'"
+                " && document.querySelector('canvas.widget-scene-canvas') !== null;"
+            )
+        )
+    except TimeoutException:
+        print("⚠️  Page load timeout, continuing...")
 
 def handle_google_consent(driver):
     """
@@ -452,20 +534,19 @@ def handle_google_consent(driver):
     Inspired by auto_walkthrough.py consent handling
     """
     try:
-        print("🔄 Attempting to handle Google consent...")
-        
-        # Get the body element for keyboard interaction
-        body = driver.find_element(By.TAG_NAME, "body")
+        # The shared profile keeps the consent cookie, so Maps usually opens
+        # directly: the keys would then trigger whatever control has the focus
+        if "consent.google.com" not in driver.current_url:
+            print("✅ No Google consent page to handle")
+            return
         
-        # Navigate through consent dialog using TAB and ENTER
-        # This mimics the auto_walkthrough.py approach
-        for i in range(5):
-            body.send_keys(Keys.TAB)
-            time.sleep(0.1)
+        print("🔄 Attempting to handle Google consent...")
         
-        # Press ENTER to accept/confirm
-        body.send_keys(Keys.ENTER)
-        time.sleep(1.3)
+        # Navigate through consent dialog using TAB and ENTER, then wait to be
+        # sent back to Maps. This mimics the auto_walkthrough.py approach, with
+        # all keys sent in one WebDriver call
+        ActionChains(driver).send_keys(Keys.TAB * 5 + Keys.ENTER).perform()
+        WebDriverWait(driver, 5).until(EC.url_contains("/maps/"))
         
         print("✅ Google consent handled successfully")
         
@@ -474,64 +555,11 @@ def handle_google_consent(driver):
         print("📝 You may need to manually accept consent if it appears")
 
 
-def inject_keyboard_listener(driver):
-    """
-    Inject JavaScript keyboard listener into the page
-    """
-    keyboard_script = """
-    window.reviewDecision = null;
-    window.reviewDecisionReady = false;
-    
-    document.addEventListener('keydown', function(event) {
-        const key = event.key.toLowerCase();
-        
-        if (['y', 'n', 's', 'q'].includes(key)) {
-            event.preventDefault();
-            
-            if (key === 'y') {
-                window.reviewDecision = 'valid';
-                console.log('✅ Marked as VALID');
-            } else if (key === 'n') {
-                window.reviewDecision = 'invalid';
-                console.log('❌ Marked as INVALID');
-            } else if (key === 's') {
-                window.reviewDecision = 'skip';
-                console.log('⏭️ Skipped');
-            } else if (key === 'q') {
-                window.reviewDecision = 'quit';
-                console.log('👋 Quit requested');
-            }
-            
-            window.reviewDecisionReady = true;
-            
-            // Visual feedback
-            const feedback = document.getElementById('review-feedback');
-            if (feedback) {
-                const messages = {
-                    'valid': '✅ VALID - Processing...',
-                    'invalid': '❌ INVALID - Processing...',
-                    'skip': '⏭️ SKIPPED',
-                    'quit': '👋 QUITTING...'
-                };
-                feedback.innerHTML = messages[window.reviewDecision];
-                feedback.style.backgroundColor = key === 'y' ? '#27ae60' : 
-                                                  key === 'n' ? '#e74c3c' : 
-                                                  key === 's' ? '#f39c12' : '#95a5a6';
-            }
-        }
-    });
-    
-    console.log('🎹 Keyboard listener activated');
-    console.log('Press: y=valid, n=invalid, s=skip, q=quit');
-    """
-    
-    driver.execute_script(keyboard_script)
-
-def update_detection_info(driver, detection, processed_count):
+def install_panel(driver):
     """
-    Update the page with current detection information
+    Add the detection info panel to the page, refresh_panel() fills it in
     """
-    info_script = f"""
+    panel_script = """
     // Remove existing info panel
     const existingPanel = document.getElementById('review-panel');
     if (existingPanel) existingPanel.remove();
@@ -554,10 +582,10 @@ def update_detection_info(driver, detection, processed_count):
     `;
     
     panel.innerHTML = `
-        <h3 style="margin: 0 0 10px 0; color: #3498db;">🚴 Detection #{detection['id']}</h3>
-        <p style="margin: 5px 0;"><strong>📍 Location:</strong> {detection['latitude']:.6f}, {detection['longitude']:.6f}</p>
-        <p style="margin: 5px 0;"><strong>🆔 Pano ID:</strong> {detection['panoid']}</p>
-        <p style="margin: 5px 0;"><strong>📊 Processed:</strong> {processed_count}</p>
+        <h3 style="margin: 0 0 10px 0; color: #3498db;">🚴 Detection #<span id="rv-id"></span></h3>
+        <p style="margin: 5px 0;"><strong>📍 Location:</strong> <span id="rv-location"></span></p>
+        <p style="margin: 5px 0;"><strong>🆔 Pano ID:</strong> <span id="rv-pano"></span></p>
+        <p style="margin: 5px 0;"><strong>📊 Processed:</strong> <span id="rv-count"></span></p>
         <hr style="margin: 10px 0; border: 1px solid #555;">
         <p style="margin: 5px 0; font-weight: bold;">🎹 Controls:</p>
         <p style="margin: 3px 0; font-size: 12px;">Y = Valid | N = Invalid | S = Skip | Q = Quit</p>
@@ -567,78 +595,233 @@ def update_detection_info(driver, detection, processed_count):
     `;
     
     document.body.appendChild(panel);
+    """
+    
+    driver.execute_script(panel_script)
+
+# Fills the panel from install_panel() with arguments (id, latitude, longitude,
+# panoid, processed count). The source never changes, only the arguments do
+REFRESH_PANEL_SCRIPT = """
+    if (!document.getElementById('review-panel')) return false;
+    
+    document.getElementById('rv-id').textContent = arguments[0];
+    document.getElementById('rv-location').textContent =
+        arguments[1].toFixed(6) + ', ' + arguments[2].toFixed(6);
+    document.getElementById('rv-pano').textContent = arguments[3];
+    document.getElementById('rv-count').textContent = arguments[4];
+    
+    const feedback = document.getElementById('review-feedback');
+    feedback.textContent = 'Ready for review...';
+    feedback.style.backgroundColor = '#34495e';
     
     // Reset decision state
     window.reviewDecision = null;
     window.reviewDecisionReady = false;
-    """
-    
-    driver.execute_script(info_script)
+    return true;
+"""
 
-def wait_for_user_decision(driver, timeout=300):
+def refresh_panel(driver, detection, processed_count):
     """
-    Wait for user to make a decision via keyboard
+    Show the current detection in the info panel
+    
+    Only the text of the panel changes, so the page is not re-laid out around
+    a rebuilt panel for every detection.
     
     Args:
         driver: Selenium WebDriver instance
-        timeout: Maximum wait time in seconds
+        detection (dict): Detection with id, latitude, longitude and panoid
+        processed_count (int): Decisions made in this session
     
     Returns:
-        str: User decision ('valid', 'invalid', 'skip', 'quit')
+        bool: False if the page has no panel, install_panel() first
     """
-    start_time = time.time()
+    return driver.execute_script(
+        REFRESH_PANEL_SCRIPT,
+        detection['id'],
+        float(detection['latitude']),
+        float(detection['longitude']),
+        detection['panoid'],
+        processed_count
+    )
+
+def iter_unprocessed_detections(conn, batch_size=500):
+    """
+    Stream the unprocessed detections in id order
     
-    while time.time() - start_time < timeout:
+    Runs the anti-join once through a server-side cursor instead of once per
+    detection. When the stream runs out, it is queried again for detections
+    added after the last one seen, so skipped detections are not shown twice.
+    
+    Args:
+        conn: Database connection
+        batch_size (int): Rows fetched per round-trip
+    
+    Yields:
+        tuple: (id, latitude, longitude, panoid)
+    """
+    last_id = 0
+    
+    while True:
+        # Decisions are committed on the writer thread's own connection, this
+        # one never commits while the stream is read, so no WITH HOLD is needed
+        cursor = conn.cursor(name='review_cur')
+        cursor.itersize = batch_size
+        found = False
+        
         try:
-            # Check if decision is ready
-            decision_ready = driver.execute_script("return window.reviewDecisionReady;")
-            
-            if decision_ready:
-                decision = driver.execute_script("return window.reviewDecision;")
-                
-                # Reset for next iteration
-                driver.execute_script("""
-                    window.reviewDecision = null;
-                    window.reviewDecisionReady = false;
-                """)
-                
-                return decision
+            cursor.execute("""
+                SELECT v.id, v.latitude, v.longitude, v.panoid
+                FROM velopark v
+                WHERE v.id > %s
+                  AND NOT EXISTS (
+                      SELECT 1 FROM processed_data pd WHERE pd.velopark_id = v.id
+                  )
+                ORDER BY v.id
+            """, (last_id,))
             
-            time.sleep(0.1)
+            for row in cursor:
+                found = True
+                last_id = row[0]
+                yield row
+        
+        finally:
+            cursor.close()
+        
+        if not found:
+            return
+
+def prepare_decision_insert(cursor):
+    """
+    Prepare the decision upsert once per connection
+    
+    Prepared statements live as long as the connection, which the pool keeps
+    open between sessions, so it is only prepared when not already there.
+    
+    Args:
+        cursor: Database cursor
+    """
+    cursor.execute("SELECT 1 FROM pg_prepared_statements WHERE name = 'ins_pd'")
+    if cursor.fetchone() is None:
+        cursor.execute("""
+            PREPARE ins_pd (integer, boolean, text) AS
+            INSERT INTO processed_data (velopark_id, is_valid, notes)
+            VALUES ($1, $2, $3)
+            ON CONFLICT (velopark_id) DO UPDATE SET
+                is_valid = EXCLUDED.is_valid,
+                reviewed_at = CURRENT_TIMESTAMP,
+                notes = EXCLUDED.notes
+        """)
+
+# Decisions written per transaction by write_decisions()
+DECISIONS_PER_COMMIT = 16
+
+def write_decisions(decision_queue):
+    """
+    Save review decisions to the database as they are queued
+    
+    Runs in its own thread with its own connection, so the review loop can show
+    the next detection while the previous decision is being written. Decisions
+    are committed DECISIONS_PER_COMMIT at a time, and once more when None is
+    queued to stop the writer.
+    
+    Args:
+        decision_queue (queue.Queue): (velopark_id, is_valid) tuples
+    """
+    conn = None
+    cursor = None
+    pending = []
+    decision = None
+    
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        prepare_decision_insert(cursor)
+        
+        while True:
+            decision = decision_queue.get()
+            if decision is None:
+                break
             
-        except Exception as e:
-            print(f"⚠️  Error checking decision: {e}")
-            time.sleep(0.5)
+            velopark_id, is_valid = decision
+            if process_detection_decision_db(cursor, conn, velopark_id, is_valid, commit=False):
+                pending.append(decision)
+                if len(pending) >= DECISIONS_PER_COMMIT:
+                    commit_decisions(cursor, conn, pending)
+            else:
+                # The rollback also dropped the uncommitted decisions before it
+                for velopark_id, _ in pending + [decision]:
+                    print(f"⚠️  Failed to process detection {velopark_id}")
+                pending.clear()
+        
+        commit_decisions(cursor, conn, pending)
     
-    print("⏰ Timeout waiting for user decision, skipping...")
-    return 'skip'
+    except Exception as e:
+        print(f"❌ Error saving decisions: {e}")
+        # The uncommitted decisions are lost, with the one being written
+        if decision and decision not in pending:
+            pending.append(decision)
+        for velopark_id, _ in pending:
+            print(f"⚠️  Decision for detection {velopark_id} not saved")
+    
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            release_connection(conn)
 
-def process_detection_decision_db(cursor, conn, velopark_id, is_valid, notes=None):
+def commit_decisions(cursor, conn, pending):
     """
-    Process a decision and update the database
+    Commit the decisions written since the last commit and report them
+    
+    A lost decision only means reviewing that detection again, so the commit
+    does not wait for the WAL to reach the disk.
     
     Args:
         cursor: Database cursor
         conn: Database connection
+        pending (list): (velopark_id, is_valid) tuples of the open transaction,
+            emptied once committed
+    """
+    if not pending:
+        return
+    
+    try:
+        cursor.execute("SET LOCAL synchronous_commit = off")
+        conn.commit()
+        
+        for velopark_id, is_valid in pending:
+            status = "✅ VALID" if is_valid else "❌ INVALID"
+            print(f"{status} - Detection {velopark_id} processed successfully")
+    
+    except Exception as e:
+        print(f"❌ Database error: {e}")
+        conn.rollback()
+        for velopark_id, _ in pending:
+            print(f"⚠️  Failed to process detection {velopark_id}")
+    
+    pending.clear()
+
+def process_detection_decision_db(cursor, conn, velopark_id, is_valid, notes=None, commit=True):
+    """
+    Process a decision and update the database
+    
+    Args:
+        cursor: Database cursor, with the upsert prepared by prepare_decision_insert()
+        conn: Database connection
         velopark_id (int): ID of the velopark record
         is_valid (bool): Whether the detection is valid
         notes (str): Optional notes
+        commit (bool): Commit right away, otherwise the caller commits later
     
     Returns:
         bool: Success status
     """
     try:
-        # Insert into processed_data table
-        cursor.execute("""
-            INSERT INTO processed_data (velopark_id, is_valid, notes)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (velopark_id) DO UPDATE SET
-                is_valid = EXCLUDED.is_valid,
-                reviewed_at = CURRENT_TIMESTAMP,
-                notes = EXCLUDED.notes
-        """, (velopark_id, is_valid, notes))
+        # Insert into processed_data table with the prepared upsert
+        cursor.execute("EXECUTE ins_pd (%s, %s, %s)", (velopark_id, is_valid, notes))
         
-        conn.commit()
+        if commit:
+            conn.commit()
         return True
         
     except Exception as e:
@@ -648,6 +831,107 @@ def process_detection_decision_db(cursor, conn, velopark_id, is_valid, notes=Non
 
 
 
+def prefetch_street_views(windows=PREFETCH_WINDOWS):
+    """
+    Load the panoramas of all unprocessed detections ahead of a review session
+    
+    A headless Firefox on the shared review profile opens several windows and
+    starts loading a panorama in each at the same time, so the network fetches
+    overlap. The review session then gets the tiles from the profile's cache.
+    Both cannot run at once, Firefox locks the profile.
+    
+    Args:
+        windows (int): Number of panoramas loaded in parallel
+    """
+    firefox_options = Options()
+    firefox_options.add_argument("--headless")
+    use_shared_profile(firefox_options)
+    
+    # driver.get() returns at once, the loads are awaited separately below
+    firefox_options.page_load_strategy = "none"
+    
+    # Nobody watches this browser: no media or notifications, and more
+    # parallel connections for the tile requests of all windows
+    firefox_options.set_preference("media.autoplay.default", 5)
+    firefox_options.set_preference("dom.webnotifications.enabled", False)
+    firefox_options.set_preference("network.http.max-persistent-connections-per-server", 16)
+    
+    service = Service(get_geckodriver_path())
+    driver = webdriver.Firefox(service=service, options=firefox_options)
+    
+    conn = None
+    detections = None
+    prefetched = 0
+    
+    try:
+        conn = get_connection()
+        detections = iter_unprocessed_detections(conn, batch_size=64)
+        
+        handles = [driver.current_window_handle]
+        for _ in range(windows - 1):
+            driver.switch_to.new_window('window')
+            handles.append(driver.current_window_handle)
+        
+        consent_handled = False
+        
+        print(f"🚀 Prefetching Street View panoramas in {windows} windows")
+        
+        while True:
+            batch = list(islice(detections, windows))
+            if not batch:
+                break
+            
+            # Start every load of the batch, then wait for each of them
+            for handle, (velopark_id, latitude, longitude, panoid) in zip(handles, batch):
+                driver.switch_to.window(handle)
+                driver.get(build_street_view_url(latitude, longitude, panoid))
+                
+                if not consent_handled:
+                    # driver.get returns before the first response: wait for
+                    # it to land on the consent page or on Maps, handle consent
+                    # before waiting for a canvas the consent page never draws
+                    try:
+                        WebDriverWait(driver, 15).until(
+                            lambda d: "consent.google.com" in d.current_url or "/maps/" in d.current_url
+                        )
+                    except TimeoutException:
+                        print("⚠️  Page load timeout, continuing...")
+                    handle_google_consent(driver)
+                    wait_for_street_view(driver)
+                    consent_handled = True
+            
+            for handle in handles[:len(batch)]:
+                driver.switch_to.window(handle)
+                try:
+                    WebDriverWait(driver, 30).until(
+                        lambda d: d.execute_script("return document.readyState") == "complete"
+                    )
+                except TimeoutException:
+                    print("⚠️  Page load timeout, continuing...")
+            
+            prefetched += len(batch)
+            if prefetched % 64 < len(batch):
+                print(f"📥 Prefetched {prefetched} panoramas")
+        
+        print(f"✅ Prefetched {prefetched} panoramas")
+    
+    except KeyboardInterrupt:
+        print(f"\n⏹️  Prefetch interrupted after {prefetched} panoramas")
+    
+    except Exception as e:
+        print(f"❌ Error prefetching panoramas: {e}")
+    
+    finally:
+        if detections:
+            detections.close()
+        if conn:
+            release_connection(conn)
+        
+        try:
+            driver.quit()
+        except:
+            pass
+
 def get_review_progress():
     """
     Get current review progress
@@ -656,26 +940,20 @@ def get_review_progress():
     cursor = None
     
     try:
-        conn = psycopg2.connect(
-            host="localhost",
-            database="imagedb",
-            user="arthur",
-            password=""
-        )
+        conn = get_connection()
         
         cursor = conn.cursor()
         
-        cursor.execute("SELECT COUNT(*) FROM velopark")
-        total = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM processed_data")
-        processed = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM processed_data WHERE is_valid = true")
-        valid = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM processed_data WHERE is_valid = false")
-        invalid = cursor.fetchone()[0]
+        # All counters in one round-trip
+        cursor.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM velopark),
+                COUNT(*),
+                COUNT(*) FILTER (WHERE is_valid = true),
+                COUNT(*) FILTER (WHERE is_valid = false)
+            FROM processed_data
+        """)
+        total, processed, valid, invalid = cursor.fetchone()
         
         remaining = total - processed
         
@@ -697,7 +975,7 @@ def get_review_progress():
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            release_connection(conn)
 
 def reset_review_progress():
     """
@@ -707,12 +985,7 @@ def reset_review_progress():
     cursor = None
     
     try:
-        conn = psycopg2.connect(
-            host="localhost",
-            database="imagedb",
-            user="arthur",
-            password=""
-        )
+        conn = get_connection()
         
         cursor = conn.cursor()
         
@@ -730,7 +1003,7 @@ def reset_review_progress():
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            release_connection(conn)
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
@@ -738,10 +1011,13 @@ if __name__ == "__main__":
             get_review_progress()
         elif sys.argv[1] == "--reset":
             reset_review_progress()
+        elif sys.argv[1] == "--prefetch":
+            prefetch_street_views()
         else:
             print("Usage:")
             print("  python processresultv2.py           - Start review system")
             print("  python processresultv2.py --progress - Show progress")
             print("  python processresultv2.py --reset   - Reset progress")
+            print("  python processresultv2.py --prefetch - Preload panoramas for review")
     else:
         create_selenium_review_system()
\ No newline at end of file
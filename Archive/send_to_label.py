@@ -2,8 +2,155 @@ import os
 import sys
 import csv
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
 from pathlib import Path
 
+# Image extensions tried for names given without one, in order of preference
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG']
+
+# Parallel copies, enough to keep an SSD's queue busy
+COPY_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+def index_source_files(source_dir):
+    """
+    Index the source images in a single walk of the directory tree
+    
+    os.scandir gives the entry types from the directory listing itself, so the
+    walk needs no extra stat per file, unlike a Path.rglob search per image.
+    
+    Args:
+        source_dir (Path): Root of the source images
+    
+    Returns:
+        tuple: (top_level_images, files) where top_level_images maps the names
+            of the images directly in source_dir, and their names without the
+            image extension, to the image file name, and files maps each file
+            name found in the tree to the path of its first occurrence, in
+            Path.rglob() order
+    """
+    top_level_images = {}
+    stems = {}
+    files = {}
+    
+    def walk(directory, is_root):
+        subdirs = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file():
+                    files.setdefault(entry.name, Path(entry.path))
+                    if is_root:
+                        add_top_level_image(entry.name)
+        for subdir in subdirs:
+            walk(subdir, False)
+    
+    def add_top_level_image(name):
+        for rank, ext in enumerate(IMAGE_EXTENSIONS):
+            if name.endswith(ext):
+                top_level_images[name] = name
+                # Keep the extension tried first when several images share a stem
+                stem = name[:-len(ext)]
+                if stem not in stems or rank < stems[stem][0]:
+                    stems[stem] = (rank, name)
+                break
+    
+    walk(source_dir, True)
+    # A full image name takes precedence over the same text as a stem
+    for stem, (rank, name) in stems.items():
+        top_level_images.setdefault(stem, name)
+    return top_level_images, files
+
+def copy_image(source_file, dest_file):
+    """
+    Copy an image with its metadata, like shutil.copy2, inside the kernel
+    
+    os.copy_file_range copies without going through user space and lets
+    filesystems with reflinks (Btrfs, XFS) share the blocks instead of copying
+    them. When it isn't supported, shutil.copyfile falls back to sendfile.
+    
+    Args:
+        source_file (Path): Image to copy
+        dest_file (Path): Destination path
+    """
+    try:
+        with open(source_file, 'rb') as src, open(dest_file, 'wb') as dst:
+            remaining = os.fstat(src.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                if copied == 0:
+                    # No progress before the expected size: unsupported by the
+                    # filesystem or the source changed, copy it the usual way
+                    raise OSError("copy_file_range made no progress")
+                remaining -= copied
+    except (AttributeError, OSError):
+        # No copy_file_range (older kernel, other OS or cross-device copy).
+        # copyfile truncates the partial destination before copying again
+        shutil.copyfile(source_file, dest_file)
+    
+    shutil.copystat(source_file, dest_file)
+
+def count_csv_rows(csv_path):
+    """
+    Count the data rows of a CSV file without parsing it
+    
+    Counts the newlines of the raw bytes in 1 MiB chunks, which bytes.count
+    does in C, instead of decoding every row with csv.reader. Quoted fields
+    spanning several lines would be counted once per line; rdorder.csv has none.
+    
+    Args:
+        csv_path (Path): Path to the CSV file, with a header row
+    
+    Returns:
+        int: Number of rows after the header
+    """
+    lines = 0
+    last_chunk = b''
+    with open(csv_path, 'rb', buffering=0) as f:
+        while chunk := f.read(1 << 20):
+            lines += chunk.count(b'\n')
+            last_chunk = chunk
+    
+    # The last line still counts when the file doesn't end with a newline
+    if last_chunk and not last_chunk.endswith(b'\n'):
+        lines += 1
+    
+    return max(0, lines - 1)
+
+def cached_csv_rows(csv_path):
+    """
+    Count the data rows of a CSV file, reusing the count of a previous run
+    
+    The count is stored in a sidecar file (rdorder.csv.count) together with the
+    modification time and size of the CSV, so it is recounted only when the
+    CSV has changed.
+    
+    Args:
+        csv_path (Path): Path to the CSV file, with a header row
+    
+    Returns:
+        int: Number of rows after the header
+    """
+    st = os.stat(csv_path)
+    fingerprint = f"{st.st_mtime_ns}:{st.st_size}"
+    cache_file = csv_path.with_name(csv_path.name + '.count')
+    
+    try:
+        cached_fingerprint, cached_rows = cache_file.read_text().strip().split('|')
+        if cached_fingerprint == fingerprint:
+            return int(cached_rows)
+    except (OSError, ValueError):
+        pass
+    
+    rows = count_csv_rows(csv_path)
+    try:
+        cache_file.write_text(f"{fingerprint}|{rows}")
+    except OSError:
+        pass  # Read-only folder, just count again next time
+    
+    return rows
+
 def send_images_to_label(count=100):
     """
     Send the next batch of images to labeling folder based on current progress.
@@ -61,9 +208,12 @@ def send_images_to_label(count=100):
             # Skip header
             next(reader, None)
             
-            # Convert to list to count total lines
-            all_rows = list(reader)
-            total_lines = len(all_rows)
+            # Skip the processed rows and keep only the next count rows,
+            # without loading the whole CSV
+            for _ in islice(reader, current_processed):
+                pass
+            rows = list(islice(reader, count))
+            total_lines = cached_csv_rows(rdorder_csv)
             
             # Check if we have enough remaining lines
             if current_processed >= total_lines:
@@ -71,15 +221,11 @@ def send_images_to_label(count=100):
                 return True
             
             # Extract the required range
-            end_index = min(current_processed + count, total_lines)
-            
-            for i in range(current_processed, end_index):
-                if i < len(all_rows):
-                    row = all_rows[i]
-                    if row:  # Skip empty rows
-                        filename = row[0].strip()
-                        if filename:
-                            filenames_to_copy.append(filename)
+            for row in rows:
+                if row:  # Skip empty rows
+                    filename = row[0].strip()
+                    if filename:
+                        filenames_to_copy.append(filename)
             
             print(f"📋 Found {len(filenames_to_copy)} filenames to process")
             print(f"📈 Will process lines {current_processed + 1} to {current_processed + len(filenames_to_copy)}")
@@ -98,63 +244,74 @@ def send_images_to_label(count=100):
     
     print(f"\n🔄 Starting file copy operation...")
     
-    for i, filename in enumerate(filenames_to_copy):
+    # List the destination once instead of checking every file with a stat
+    existing_files = set(os.listdir(dest_dir))
+    
+    # Same for the source tree, instead of probing and searching per file
+    source_top_level_images, source_files = index_source_files(source_dir)
+    
+    # Resolve the sources first, the copies themselves then run in parallel
+    copies = []
+    for filename in filenames_to_copy:
         try:
             # Handle both direct filenames and relative paths
             if '/' in filename:
-                # It's a relative path from street_view_images
+                # It's a relative path from street_view_images, the only case
+                # not answered by the source index
                 source_file = source_dir / filename
+                if not source_file.exists():
+                    source_file = None
             else:
-                # It's just a filename, search for it
+                # It's just a filename, look it up with or without its extension
                 source_file = None
-                # Try different image extensions
-                for ext in ['.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG']:
-                    if filename.endswith(ext):
-                        potential_file = source_dir / filename
-                        if potential_file.exists():
-                            source_file = potential_file
-                            break
-                    else:
-                        # Try adding extension if not present
-                        potential_file = source_dir / (filename + ext)
-                        if potential_file.exists():
-                            source_file = potential_file
-                            filename = filename + ext  # Update filename for destination
-                            break
+                image_name = source_top_level_images.get(filename)
+                if image_name is not None:
+                    source_file = source_dir / image_name
+                    filename = image_name  # Update filename for destination
                 
                 if source_file is None:
                     # Search recursively
-                    for file_path in source_dir.rglob(filename):
-                        if file_path.is_file():
-                            source_file = file_path
-                            break
+                    source_file = source_files.get(filename)
             
-            if source_file is None or not source_file.exists():
+            if source_file is None:
                 print(f"   ❌ {filename}: File not found")
                 stats['not_found'] += 1
                 continue
             
-            # Destination file path
-            dest_file = dest_dir / source_file.name
-            
-            # Check if already exists
-            if dest_file.exists():
+            # Check if already exists, or is already queued by an earlier row
+            if source_file.name in existing_files:
                 print(f"   ⚠️  {source_file.name}: Already exists, skipping")
                 stats['already_exists'] += 1
                 continue
             
-            # Copy the file
-            shutil.copy2(source_file, dest_file)
-            stats['copied'] += 1
-            
-            # Progress indicator
-            if (i + 1) % 10 == 0:
-                print(f"   📊 Progress: {i + 1}/{len(filenames_to_copy)} files processed")
+            existing_files.add(source_file.name)
+            copies.append((filename, source_file, dest_dir / source_file.name))
             
         except Exception as e:
             print(f"   ❌ Error copying {filename}: {e}")
             stats['errors'] += 1
     
+    # Each copy mostly waits on read/write syscalls, which release the GIL, so
+    # a thread pool overlaps them. Every copy writes its own destination file.
+    with ThreadPoolExecutor(max_workers=COPY_WORKERS) as executor:
+        futures = {
+            executor.submit(copy_image, source_file, dest_file): (filename, dest_file)
+            for filename, source_file, dest_file in copies
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            filename, dest_file = futures[future]
+            try:
+                future.result()
+                stats['copied'] += 1
+            except Exception as e:
+                print(f"   ❌ Error copying {filename}: {e}")
+                stats['errors'] += 1
+                existing_files.discard(dest_file.name)
+            
+            # Progress indicator
+            if done % 10 == 0:
+                print(f"   📊 Progress: {done}/{len(copies)} files copied")
+    
     # Update nb_processed file
     new_processed_count = current_processed + len(filenames_to_copy)
     try:
@@ -170,7 +327,7 @@ def send_images_to_label(count=100):
     print(f"   ❌ Files not found: {stats['not_found']}")
     print(f"   ⚠️  Already exists: {stats['already_exists']}")
     print(f"   ❌ Copy errors: {stats['errors']}")
-    print(f"   📁 Total files in destination: {len(list(dest_dir.glob('*')))}")
+    print(f"   📁 Total files in destination: {sum(1 for name in existing_files if not name.startswith('.'))}")
     
     # Show remaining work
     remaining = total_lines - new_processed_count
@@ -201,10 +358,7 @@ def show_status():
     total_lines = 0
     if rdorder_csv.exists():
         try:
-            with open(rdorder_csv, 'r', encoding='utf-8') as csvfile:
-                reader = csv.reader(csvfile)
-                next(reader, None)  # Skip header
-                total_lines = sum(1 for _ in reader)
+            total_lines = cached_csv_rows(rdorder_csv)
         except Exception:
             total_lines = 0
     
@@ -1,14 +1,158 @@
+from functools import lru_cache
 from ultralytics import YOLO
 from pathlib import Path
 import cv2
 import numpy as np
+import torch
+
+# Trained model weights
+MODEL_PATH = "/home/arthur/Bureau/velopark_waypoints/AI.pt"
+
+# Run inference in FP16, which only pays off on a CUDA GPU
+USE_HALF = torch.cuda.is_available()
+
+@lru_cache(maxsize=1)
+def load_model(model_path=MODEL_PATH):
+    """
+    Load the trained YOLO model, once per process
+    
+    Later calls reuse the same model, already loaded and on its device.
+    
+    Args:
+        model_path (str): Path to the model weights
+    
+    Returns:
+        YOLO: The loaded model
+    """
+    return YOLO(model_path)
+
+def failed_prediction(error):
+    """
+    Build the result of a prediction that could not run
+    
+    Args:
+        error (str): Description of the failure
+    
+    Returns:
+        dict: predict_velo_parking result with 'error' set and no detection
+    """
+    return {
+        'error': error,
+        'has_velo_parking': False,
+        'confidence': 0.0,
+        'detections': [],
+        'detection_count': 0
+    }
+
+def parse_detections(result, confidence_threshold):
+    """
+    Turn the YOLO result of one image into a predict_velo_parking result
+    
+    Args:
+        result: YOLO result of a single image
+        confidence_threshold (float): Minimum confidence score for detection (0.0-1.0)
+    
+    Returns:
+        dict: Same as predict_velo_parking
+    """
+    # Extract detections
+    detections = []
+    max_confidence = 0.0
+    
+    if result.boxes is not None and len(result.boxes) > 0:
+        for box in result.boxes:
+            confidence = float(box.conf[0])
+            
+            # Only consider detections above threshold
+            if confidence >= confidence_threshold:
+                # Get bounding box coordinates
+                x1, y1, x2, y2 = box.xyxy[0].tolist()
+                
+                detection = {
+                    'confidence': confidence,
+                    'bbox': {
+                        'x1': int(x1),
+                        'y1': int(y1),
+                        'x2': int(x2),
+                        'y2': int(y2)
+                    },
+                    'class': 'velo_park'
+                }
+                detections.append(detection)
+                
+                # Update max confidence
+                if confidence > max_confidence:
+                    max_confidence = confidence
+    
+    # Determine if bicycle parking is present
+    has_velo_parking = len(detections) > 0
+    
+    return {
+        'has_velo_parking': has_velo_parking,
+        'confidence': max_confidence,
+        'detections': detections,
+        'detection_count': len(detections)
+    }
+
+def predict_velo_parking_batch(image_paths, confidence_threshold=0.5, batch_size=16):
+    """
+    Predict bicycle parking for many images with batched inference.
+    
+    The model is loaded once and the images go through it batch_size at a
+    time, instead of one model load and one forward pass per image.
+    
+    Args:
+        image_paths (list): Paths to the image files, or images already loaded
+            as BGR numpy arrays (as returned by cv2.imread)
+        confidence_threshold (float): Minimum confidence score for detection (0.0-1.0)
+        batch_size (int): Number of images per forward pass
+    
+    Returns:
+        list: One predict_velo_parking result per image, in the same order
+    """
+    
+    try:
+        model = load_model()
+    except Exception as e:
+        return [failed_prediction(f"Failed to load model: {e}") for _ in image_paths]
+    
+    # Check which images exist, only those go through the model
+    predictions = [None] * len(image_paths)
+    to_predict = []
+    for i, image_path in enumerate(image_paths):
+        if isinstance(image_path, np.ndarray) or Path(image_path).exists():
+            to_predict.append(i)
+        else:
+            predictions[i] = failed_prediction(f"Image not found: {image_path}")
+    
+    # ultralytics runs a list source as a single batch, so split it here: one
+    # forward pass per batch_size images, and a failure only affects its batch
+    for start in range(0, len(to_predict), batch_size):
+        batch = to_predict[start:start + batch_size]
+        try:
+            sources = [
+                image_paths[i] if isinstance(image_paths[i], np.ndarray) else str(image_paths[i])
+                for i in batch
+            ]
+            # FP16 only on a GPU: ultralytics would also convert the model and
+            # inputs on CPU, where FP16 is slow or unsupported
+            results = model(sources, half=USE_HALF)
+            for i, result in zip(batch, results):
+                predictions[i] = parse_detections(result, confidence_threshold)
+        except Exception as e:
+            for i in batch:
+                if predictions[i] is None:
+                    predictions[i] = failed_prediction(f"Prediction failed: {e}")
+    
+    return predictions
 
 def predict_velo_parking(image_path, confidence_threshold=0.5):
     """
     Predict if there is bicycle parking in the given image using the trained AI model.
     
     Args:
-        image_path (str): Path to the image file
+        image_path (str): Path to the image file, or the image already loaded
+            as a BGR numpy array (as returned by cv2.imread)
         confidence_threshold (float): Minimum confidence score for detection (0.0-1.0)
     
     Returns:
@@ -19,85 +163,7 @@ def predict_velo_parking(image_path, confidence_threshold=0.5):
             'detection_count': int
         }
     """
-    
-    # Load the trained model
-    model_path = "/home/arthur/Bureau/velopark_waypoints/AI.pt"
-    
-    try:
-        model = YOLO(model_path)
-    except Exception as e:
-        return {
-            'error': f"Failed to load model: {e}",
-            'has_velo_parking': False,
-            'confidence': 0.0,
-            'detections': [],
-            'detection_count': 0
-        }
-    
-    # Check if image exists
-    if not Path(image_path).exists():
-        return {
-            'error': f"Image not found: {image_path}",
-            'has_velo_parking': False,
-            'confidence': 0.0,
-            'detections': [],
-            'detection_count': 0
-        }
-    
-    try:
-        # Run inference on the image
-        results = model(image_path)
-        
-        # Get the first result (single image)
-        result = results[0]
-        
-        # Extract detections
-        detections = []
-        max_confidence = 0.0
-        
-        if result.boxes is not None and len(result.boxes) > 0:
-            for box in result.boxes:
-                confidence = float(box.conf[0])
-                
-                # Only consider detections above threshold
-                if confidence >= confidence_threshold:
-                    # Get bounding box coordinates
-                    x1, y1, x2, y2 = box.xyxy[0].tolist()
-                    
-                    detection = {
-                        'confidence': confidence,
-                        'bbox': {
-                            'x1': int(x1),
-                            'y1': int(y1),
-                            'x2': int(x2),
-                            'y2': int(y2)
-                        },
-                        'class': 'velo_park'
-                    }
-                    detections.append(detection)
-                    
-                    # Update max confidence
-                    if confidence > max_confidence:
-                        max_confidence = confidence
-        
-        # Determine if bicycle parking is present
-        has_velo_parking = len(detections) > 0
-        
-        return {
-            'has_velo_parking': has_velo_parking,
-            'confidence': max_confidence,
-            'detections': detections,
-            'detection_count': len(detections)
-        }
-        
-    except Exception as e:
-        return {
-            'error': f"Prediction failed: {e}",
-            'has_velo_parking': False,
-            'confidence': 0.0,
-            'detections': [],
-            'detection_count': 0
-        }
+    return predict_velo_parking_batch([image_path], confidence_threshold)[0]
 
 def predict_and_visualize(image_path, output_path="/home/arthur/Bureau/velopark_waypoints/test_image", confidence_threshold=0.5):
     """
@@ -112,16 +178,17 @@ def predict_and_visualize(image_path, output_path="/home/arthur/Bureau/velopark_
         dict: Same as predict_velo_parking + 'output_image_path'
     """
     
-    # Get prediction results
-    prediction = predict_velo_parking(image_path, confidence_threshold)
+    # Decode the image once, the model and the drawing both use the array
+    image = cv2.imread(image_path)
+    
+    # Get prediction results, from the path if OpenCV couldn't read the image
+    prediction = predict_velo_parking(image if image is not None else image_path, confidence_threshold)
     
     if 'error' in prediction:
         return prediction
     
-    # Load and annotate image
+    # Annotate image
     try:
-        image = cv2.imread(image_path)
-        
         # Draw bounding boxes for each detection
         for detection in prediction['detections']:
             bbox = detection['bbox']
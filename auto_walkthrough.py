@@ -1431,8 +1431,8 @@ CREATE TABLE IF NOT EXISTS panoids (
 -- (You mentioned you already have this)
 CREATE TABLE IF NOT EXISTS to_insert (
     id SERIAL PRIMARY KEY,
-    latitude DECIMAL(10, 8) NOT NULL,
-    longitude DECIMAL(11, 8) NOT NULL,
+    latitude DOUBLE PRECISION NOT NULL,
+    longitude DOUBLE PRECISION NOT NULL,
     geom GEOMETRY(POINT, 4326)
 );
 